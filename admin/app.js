@@ -486,6 +486,7 @@ function populateUI() {
     setVal('siteDomain', s.domain);
     setVal('paramLive', s.param_live || 'stream');
     setVal('paramInfo', s.param_info || 'info');
+    setVal('sectionPageRows', s.section_page_rows || 20);
     setVal('logoUrl', s.logo_url);
     setVal('faviconUrl', s.favicon_url);
     setVal('footerCopyright', s.footer_copyright);
@@ -1627,7 +1628,8 @@ document.getElementById('saveBtn').onclick = async () => {
         footer_copyright: getVal('footerCopyright'), footer_disclaimer: getVal('footerDisclaimer'),
         target_country: c,
         param_live: getVal('paramLive') || 'stream',
-        param_info: getVal('paramInfo') || 'info'
+        param_info: getVal('paramInfo') || 'info',
+        section_page_rows: parseInt(getVal('sectionPageRows')) || 20
     };
     configData.social_sharing = {
         counts: { telegram: parseInt(getVal('socialTelegram'))||0, whatsapp: parseInt(getVal('socialWhatsapp'))||0, reddit: parseInt(getVal('socialReddit'))||0, twitter: parseInt(getVal('socialTwitter'))||0 },
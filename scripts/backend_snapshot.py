@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import time
+import requests
+from entity_names import clean_display_name
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# One backend download per pipeline run, shared by fetch_streamed.py and generate_map.py
+BACKEND_URL = "https://vercelapi-olive.vercel.app/api/sync-nodes?country=us"
+SNAPSHOT_PATH = "assets/data/backend_snapshot.json"
+SNAPSHOT_MAX_AGE = 30 * 60   # seconds before a snapshot is considered stale
+FETCH_TIMEOUT = 15
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# Only the fields the asset scripts read are kept in the snapshot
+KEEP_FIELDS = ['home_team', 'away_team', 'league', 'home_team_image', 'away_team_image', 'league_image']
+
+# ==========================================
+# 2. HELPERS
+# ==========================================
+def normalize_matches(raw_matches):
+    """Keeps the asset fields, pre-cleans team names once and drops duplicate fixtures."""
+    out = []
+    seen = set()
+    for m in raw_matches:
+        if not isinstance(m, dict): continue
+        entry = {k: m.get(k) for k in KEEP_FIELDS if m.get(k)}
+        if not entry.get('home_team') and not entry.get('away_team') and not entry.get('league'): continue
+        if entry.get('home_team'): entry['home_clean'] = clean_display_name(entry['home_team'])
+        if entry.get('away_team'): entry['away_clean'] = clean_display_name(entry['away_team'])
+        key = json.dumps(entry, sort_keys=True)
+        if key in seen: continue
+        seen.add(key)
+        out.append(entry)
+    return out
+
+def is_fresh(snapshot, max_age=SNAPSHOT_MAX_AGE):
+    return bool(snapshot) and (time.time() - snapshot.get('fetched', 0)) < max_age
+
+def read_snapshot():
+    if os.path.exists(SNAPSHOT_PATH):
+        try:
+            with open(SNAPSHOT_PATH, 'r', encoding='utf-8') as f: return json.load(f)
+        except: return {}
+    return {}
+
+def fetch_snapshot():
+    data = requests.get(BACKEND_URL, headers=HEADERS, timeout=FETCH_TIMEOUT).json()
+    snapshot = {
+        'fetched': int(time.time()),
+        'source': BACKEND_URL,
+        'matches': normalize_matches(data.get('matches', []))
+    }
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+    with open(SNAPSHOT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'), ensure_ascii=False)
+    return snapshot
+
+def load_snapshot(max_age=SNAPSHOT_MAX_AGE, force=False):
+    """
+    Returns the normalized backend match list. Re-fetches only when the stored
+    snapshot is older than max_age (or force=True); a failed fetch falls back
+    to the stale snapshot so one backend outage does not empty the pipeline.
+    """
+    snapshot = read_snapshot()
+    if not force and is_fresh(snapshot, max_age):
+        age = int(time.time() - snapshot['fetched'])
+        print(f" > Using backend snapshot ({len(snapshot['matches'])} matches, {age}s old)")
+        return snapshot['matches']
+
+    try:
+        snapshot = fetch_snapshot()
+        print(f" > Backend snapshot refreshed ({len(snapshot['matches'])} matches)")
+    except Exception as e:
+        if not snapshot: raise
+        print(f"   [!] Backend fetch failed ({e}), using stale snapshot")
+    return snapshot.get('matches', [])
+
+# ==========================================
+# 3. MAIN EXECUTION (Pipeline Stage)
+# ==========================================
+def main():
+    print("--- Backend Snapshot ---")
+    load_snapshot(force='--force' in sys.argv)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 import json
 import os
 import re
+import sys
 import datetime
+import hashlib
+import glob
+from collections import Counter
+from entity_names import slugify
+from precompress import precompress_outputs
+from minify_html import write_minified, print_minify_report, minify_css
 
 # ==========================================
 # 1. CONFIGURATION
@@ -13,6 +20,14 @@ WATCH_TEMPLATE_PATH = 'assets/watch_template.html'
 TEMPLATE_LEAGUE = 'assets/league_template.html' # Fixed variable name
 TEMPLATE_PAGE = 'assets/page_template.html'     # Fixed variable name
 OUTPUT_DIR = '.'
+THEME_CSS_DIR = 'assets/css'   # Content-hashed theme sheets, one per template family
+JS_BUNDLE_DIR = 'assets/js'    # Content-hashed config / image-map bundles
+MANIFEST_PATH = 'assets/data/build_manifest.json'  # Per-output dependency hashes
+# Watch article/meta templates with the site placeholders ({{DOMAIN}}, {{THEME_*}}...)
+# already filled; master_engine applies the match shortcodes per prerendered page
+WATCH_TEMPLATES_PATH = 'assets/data/watch_templates.json'
+WATCH_TEMPLATE_DEFAULTS = {'meta_title': 'Watch {{HOME}} vs {{AWAY}}', 'meta_desc': '', 'meta_title_single': 'Watch {{VS}}',
+                           'meta_desc_single': '', 'article': '', 'article_single': ''}
 # ==========================================
 # SMART ENTITY MAPPING (LEAGUE -> SPORT)
 # ==========================================
@@ -173,6 +188,29 @@ def build_footer_grid(config, logo_html):
 # ==========================================
 # 3. THEME ENGINE
 # ==========================================
+def fill_placeholders(html, theme, replacements):
+    """{{THEME_*}} and the global {{KEY}} replacements of render_page."""
+    # Inject Theme Variables (With JS Boolean Safety)
+    for k, v in theme.items():
+        placeholder = f"{{{{THEME_{k.upper()}}}}}"
+        
+        # Convert Python Booleans to JS lowercase strings
+        if v is True: safe_val = "true"
+        elif v is False: safe_val = "false"
+        elif v is None: safe_val = ""
+        else: safe_val = str(v)
+        
+        html = html.replace(placeholder, safe_val)
+
+    for k, v in replacements.items():
+        html = html.replace(f"{{{{{k}}}}}", str(v))
+    return html
+
+def save_watch_templates(templates):
+    os.makedirs(os.path.dirname(WATCH_TEMPLATES_PATH), exist_ok=True)
+    with open(WATCH_TEMPLATES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(templates, f, indent=1, sort_keys=True, ensure_ascii=False)
+
 def render_page(template, config, page_data, theme_override=None):
     s = config.get('site_settings', {})
     base_theme = config.get('theme', {}).copy()
@@ -545,21 +583,11 @@ def render_page(template, config, page_data, theme_override=None):
     else:
         html = html.replace('{{ARTICLE_CONTENT}}', raw_content)
 
-    # Inject Theme Variables
-    # Inject Theme Variables (With JS Boolean Safety)
-    for k, v in theme.items():
-        placeholder = f"{{{{THEME_{k.upper()}}}}}"
-        
-        # Convert Python Booleans to JS lowercase strings
-        if v is True: safe_val = "true"
-        elif v is False: safe_val = "false"
-        elif v is None: safe_val = ""
-        else: safe_val = str(v)
-        
-        html = html.replace(placeholder, safe_val)
-
-    for k, v in replacements.items():
-        html = html.replace(f"{{{{{k}}}}}", str(v))
+    html = fill_placeholders(html, theme, replacements)
+    if page_data.get('layout') == 'watch':
+        # master_engine prerenders every match page from these (it only knows the match shortcodes)
+        config['_watch_templates'] = {k: fill_placeholders(w_conf.get(k) or default, theme, replacements)
+                                      for k, default in WATCH_TEMPLATE_DEFAULTS.items()}
 
     # --- STRUCTURAL INJECTIONS ---
     html = html.replace('{{HEADER_MENU}}', build_menu_html(m.get('header', []), 'header'))
@@ -570,8 +598,8 @@ def render_page(template, config, page_data, theme_override=None):
     f_leagues = []
     for k, v in prio.items():
         if not k.startswith('_') and v.get('hasLink'):
-            # Simple slugify for footer links
-            slug = k.lower().replace(' ', '-').replace('^[^a-z0-9]','') + "-streams"
+            # Same slug master_engine uses for hub links
+            slug = slugify(k) + "-streams"
             f_leagues.append({'title': k, 'url': f"/{slug}/"})
     html = html.replace('{{FOOTER_LEAGUES}}', build_menu_html(f_leagues, 'footer_leagues'))
 
@@ -637,18 +665,10 @@ def render_page(template, config, page_data, theme_override=None):
     html = html.replace('{{DISPLAY_HERO}}', theme.get('display_hero', 'block'))
 
     # --- JSON INJECTIONS ---
+    # Theme JSON depends on the page's override, so it stays inline
     html = html.replace('{{JS_THEME_CONFIG}}', json.dumps(theme))
-    html = html.replace('{{JS_PRIORITIES}}', json.dumps(prio))
-    # --- ADD THIS LINE ---
-    html = html.replace('{{JS_SHARE_COUNTS}}', json.dumps(config.get('social_sharing', {})))
-    
-    l_map = load_json('assets/data/league_map.json')
-    reverse_map = {}
-    if l_map:
-        for l_name, teams in l_map.items():
-            for t in teams: reverse_map[t] = l_name
-    html = html.replace('{{JS_LEAGUE_MAP}}', json.dumps(reverse_map))
-    html = html.replace('{{JS_IMAGE_MAP}}', json.dumps(load_json('assets/data/image_map.json')))
+    # Site-wide data ships once per build as hashed bundles (see section 4)
+    html = inject_js_bundles(html, config)
 
     # --- NEW: HOMEPAGE SCHEMA GENERATION (Static + Dynamic Placeholder) ---
     if page_data.get('slug') == 'home':
@@ -830,7 +850,223 @@ def generate_robots(config):
         with open('robots.txt', 'w', encoding='utf-8') as f:
             f.write(content)
 # ==========================================
-# 4. MAIN BUILD PROCESS
+# 4. SHARED THEME STYLESHEETS
+# ==========================================
+# The expanded theme <style> (the one holding :root) is moved into one cached
+# file per template family. Pages keep inline only the rules that differ from
+# their family sheet (e.g. a per-page H1 alignment).
+THEME_STYLE_RE = re.compile(r'<style>(\s*(?:/\*.*?\*/\s*)*:root\s*\{.*?)</style>', re.DOTALL)
+PENDING_PAGES = []  # (path, html, family) written together by write_pages()
+
+def split_css_rules(css):
+    """Top-level rules of a stylesheet; an @media block stays one rule."""
+    rules, depth, start = [], 0, 0
+    for i, ch in enumerate(css):
+        if ch == '{': depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:i + 1].strip())
+                start = i + 1
+    return [r for r in rules if r]
+
+# --- ASSET GENERATIONS ---
+# Theme sheets and config bundles are content-hashed. When the hash changes
+# the previous file is kept while a prerendered match page (watch/<id>/,
+# written by master_engine on its own schedule) still links to it; the next
+# engine run moves those pages to the new file and a later build removes it.
+MATCH_PAGES = 'watch/*/index.html'
+ASSET_REF_RE = re.compile(r'/(assets/(?:css|js)/[\w.-]+)')
+MATCH_PAGE_REFS = []  # [set of asset paths], read on first use each build
+
+def match_page_refs():
+    if not MATCH_PAGE_REFS:
+        refs = set()
+        for path in glob.glob(MATCH_PAGES):
+            with open(path, 'r', encoding='utf-8') as f: refs.update(ASSET_REF_RE.findall(f.read()))
+        MATCH_PAGE_REFS.append(refs)
+    return MATCH_PAGE_REFS[0]
+
+def prune_generations(pattern, keep=None):
+    """Removes the files matching pattern (except keep) that no match page uses, with their .gz/.br siblings."""
+    for old in glob.glob(pattern):
+        if old == keep or old.replace(os.sep, '/') in match_page_refs(): continue
+        for f in (old, f"{old}.gz", f"{old}.br"):
+            if os.path.exists(f): os.remove(f)
+
+def write_generation(pattern, path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path): os.utime(path)  # newest mtime = current generation (see current_generation)
+    else:
+        with open(path, 'w', encoding='utf-8') as f: f.write(content)
+    prune_generations(pattern, path)
+
+def current_generation(pattern):
+    existing = glob.glob(pattern)
+    return max(existing, key=os.path.getmtime) if existing else None
+
+# --- CONFIG BUNDLES ---
+# Data the inline scripts read from config is written once per build as
+# /assets/js/{name}.{hash}.js so browsers cache it across pages, and the name
+# only changes when the data does. A bundle carries only the keys some
+# template actually reads, and is not written at all when none does.
+JS_BUNDLES = {}  # name -> url, filled on first use each build
+BUNDLE_TEMPLATES = [TEMPLATE_MASTER, WATCH_TEMPLATE_PATH, TEMPLATE_LEAGUE, TEMPLATE_PAGE]
+
+def write_js_bundle(name, global_name, payload):
+    body = f"window.{global_name}={json.dumps(payload, separators=(',', ':'), sort_keys=True)};\n"
+    digest = hashlib.md5(body.encode('utf-8')).hexdigest()[:10]
+    path = f"{JS_BUNDLE_DIR}/{name}.{digest}.js"
+    write_generation(f"{JS_BUNDLE_DIR}/{name}.*.js", path, body)
+    return f"/{path}"
+
+def reverse_league_map(config):
+    reverse_map = {}
+    for l_name, teams in load_json('assets/data/league_map.json').items():
+        for t in teams: reverse_map[t] = l_name
+    return reverse_map
+
+# Template placeholder -> (bundle, global, key or None for the whole payload, payload source)
+JS_BUNDLE_PLACEHOLDERS = {
+    '{{JS_PRIORITIES}}': ('config', 'SITE_CONFIG', 'priorities',
+                          lambda c: c.get('sport_priorities', {}).get(c.get('site_settings', {}).get('target_country', 'US'), {})),
+    '{{JS_SHARE_COUNTS}}': ('config', 'SITE_CONFIG', 'shareCounts', lambda c: c.get('social_sharing', {})),
+    '{{JS_LEAGUE_MAP}}': ('config', 'SITE_CONFIG', 'leagueMap', reverse_league_map),
+    '{{JS_IMAGE_MAP}}': ('images', 'SITE_IMAGES', None, lambda c: load_json('assets/data/image_map.json'))
+}
+
+def bundle_expr(placeholder):
+    _, global_name, key, _ = JS_BUNDLE_PLACEHOLDERS[placeholder]
+    return f"window.{global_name}.{key}" if key else f"window.{global_name}"
+
+def get_js_bundles(config):
+    if not JS_BUNDLES:
+        templates = ""
+        for path in BUNDLE_TEMPLATES:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f: templates += f.read()
+        payloads = {}
+        for ph, (name, global_name, key, source) in JS_BUNDLE_PLACEHOLDERS.items():
+            if ph not in templates: continue
+            if key: payloads.setdefault((name, global_name), {})[key] = source(config)
+            else: payloads[(name, global_name)] = source(config)
+        for (name, global_name), payload in payloads.items():
+            JS_BUNDLES[name] = write_js_bundle(name, global_name, payload)
+        # Bundles no template reads any more
+        for name in {b[0] for b in JS_BUNDLE_PLACEHOLDERS.values()} - set(JS_BUNDLES):
+            prune_generations(f"{JS_BUNDLE_DIR}/{name}.*.js")
+    return JS_BUNDLES
+
+def inject_js_bundles(html, config):
+    """Points the JSON placeholders at bundle globals and loads the bundles just before the first inline script using them."""
+    used = [(ph, b[0]) for ph, b in JS_BUNDLE_PLACEHOLDERS.items() if ph in html]
+    if not used: return html
+    bundles = get_js_bundles(config)
+    first = min(html.find(ph) for ph, _ in used)
+    tags = "".join(f'<script src="{bundles[name]}"></script>\n' for name in dict.fromkeys(name for _, name in used))
+    insert_at = html.rfind('<script', 0, first)
+    html = html[:insert_at] + tags + html[insert_at:]
+    for ph, _ in used: html = html.replace(ph, bundle_expr(ph))
+    return html
+
+def queue_page(path, html, family):
+    PENDING_PAGES.append((path, html, family))
+
+def write_theme_sheet(family, css):
+    digest = hashlib.md5(css.encode('utf-8')).hexdigest()[:10]
+    path = f"{THEME_CSS_DIR}/{family}.{digest}.css"
+    write_generation(f"{THEME_CSS_DIR}/{family}.*.css", path, css)
+    return f"/{path}"
+
+def read_theme_sheet(family):
+    """Rules + href of the family sheet in use (None if there is none)."""
+    current = current_generation(f"{THEME_CSS_DIR}/{family}.*.css")
+    if not current: return None
+    with open(current, 'r', encoding='utf-8') as f:
+        return set(minify_css(r) for r in split_css_rules(f.read())), f"/{current}"
+
+def write_pages(skipped_families=()):
+    """
+    Splits the theme CSS out of every queued page, then writes the pages.
+    Families with pages skipped by the incremental build keep their current
+    sheet, since those untouched pages still link to it.
+    """
+    page_css = {}
+    for path, html, family in PENDING_PAGES:
+        match = THEME_STYLE_RE.search(html)
+        if match: page_css[path] = [minify_css(r) for r in split_css_rules(match.group(1))]
+
+    # Family sheet = the most common rendering among its pages
+    sheets = {}
+    for family in {p[2] for p in PENDING_PAGES}:
+        if family in skipped_families:
+            current = read_theme_sheet(family)
+            if current:
+                sheets[family] = current
+                continue
+        renders = Counter(tuple(page_css[p]) for p, _, f in PENDING_PAGES if f == family and p in page_css)
+        if not renders: continue
+        rules = renders.most_common(1)[0][0]
+        sheets[family] = (set(rules), write_theme_sheet(family, "\n".join(rules) + "\n"))
+
+    for path, html, family in PENDING_PAGES:
+        if path in page_css and family in sheets:
+            shared, href = sheets[family]
+            delta = [r for r in page_css[path] if r not in shared]
+            block = f'<link rel="stylesheet" href="{href}">'
+            if delta: block += f'\n<style id="theme-delta">{"".join(delta)}</style>'
+            html = THEME_STYLE_RE.sub(lambda _: block, html, count=1)
+        write_minified(path, html)
+    if sheets: print(f" > Theme CSS: {', '.join(f'{f} -> {v[1]}' for f, v in sorted(sheets.items()))}")
+    PENDING_PAGES.clear()
+
+# ==========================================
+# 5. INCREMENTAL BUILD MANIFEST
+# ==========================================
+# Every output records a hash of each input it was rendered from (config
+# sections, its pages[] entry, template, data files, build code). Outputs whose
+# inputs are unchanged are skipped; --full rebuilds everything and --explain
+# prints the reason for every decision.
+BUILD_CODE = ['scripts/build_site.py', 'scripts/minify_html.py', 'scripts/entity_names.py']
+COMMON_SECTIONS = ['site_settings', 'theme', 'menus', 'sport_priorities', 'social_sharing']
+WATCH_PLACEHOLDERS = re.compile(r'\{\{(WATCH_|JS_WATCH_|SUPABASE_|DISCORD_SERVER_ID)')
+
+def dep_hash(value):
+    return hashlib.md5(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def file_hash(path):
+    if not os.path.exists(path): return None
+    with open(path, 'rb') as f: return hashlib.md5(f.read()).hexdigest()[:12]
+
+def output_deps(config, template_path, template, extra):
+    """Inputs one output depends on: shared sections + template-driven data + extra (page/league specific)."""
+    deps = {f"config:{k}": dep_hash(config.get(k)) for k in COMMON_SECTIONS}
+    deps['code'] = dep_hash([file_hash(p) for p in BUILD_CODE])
+    deps[f"template:{template_path}"] = dep_hash(template)
+    deps['data:assets/data/league_map.json'] = file_hash('assets/data/league_map.json')
+    if '{{JS_IMAGE_MAP}}' in template: deps['data:assets/data/image_map.json'] = file_hash('assets/data/image_map.json')
+    if WATCH_PLACEHOLDERS.search(template): deps['config:watch_settings'] = dep_hash(config.get('watch_settings'))
+    deps.update(extra)
+    return deps
+
+def needs_rebuild(path, deps, manifest, full=False, explain=False):
+    old = manifest.get(path)
+    if full: reason = "--full"
+    elif not os.path.exists(path): reason = "output missing"
+    elif old is None: reason = "not in manifest"
+    else:
+        changed = sorted(k for k in set(deps) | set(old) if deps.get(k) != old.get(k))
+        reason = f"changed {', '.join(changed)}" if changed else None
+    if explain: print(f"   [{'rebuild' if reason else 'skip'}] {path}: {reason or 'up to date'}")
+    return bool(reason)
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+# ==========================================
+# 6. MAIN BUILD PROCESS
 # ==========================================
 def main():
     print("--- 🔨 Building Site Structure ---")
@@ -851,6 +1087,16 @@ def main():
         print("❌ Template file not found")
         return
 
+    full = '--full' in sys.argv
+    explain = '--explain' in sys.argv
+    manifest = load_json(MANIFEST_PATH)
+    new_manifest = {}
+    skipped_families = set()
+    template_paths = {
+        'home': TEMPLATE_MASTER, 'watch': WATCH_TEMPLATE_PATH,
+        'page': TEMPLATE_PAGE if os.path.exists(TEMPLATE_PAGE) else TEMPLATE_MASTER
+    }
+
     print("📄 Building Pages...")
     
     # Get Theme Contexts
@@ -865,6 +1111,18 @@ def main():
         if not slug: continue
         
         layout = page.get('layout')
+        family = layout if layout in ('watch', 'page') else 'home'
+        out_dir = os.path.join(OUTPUT_DIR, slug) if slug != 'home' else OUTPUT_DIR
+        out_path = os.path.normpath(os.path.join(out_dir, 'index.html'))
+        page_template = {'home': master_template_content, 'watch': watch_template_content, 'page': page_template_content}[family]
+        extra = {f"config:pages[{slug}]": dep_hash(page)}
+        if family != 'home': extra[f"config:theme_{family}"] = dep_hash(config.get(f"theme_{family}"))
+        deps = output_deps(config, template_paths[family], page_template, extra)
+        new_manifest[out_path] = deps
+        # The watch page also produces WATCH_TEMPLATES_PATH for master_engine
+        if not needs_rebuild(out_path, deps, manifest, full, explain) and not (family == 'watch' and not os.path.exists(WATCH_TEMPLATES_PATH)):
+            skipped_families.add(family)
+            continue
         
         final_template = master_template_content
         active_theme_override = None
@@ -898,11 +1156,10 @@ def main():
         
         # Render
         final_html = render_page(final_template, config, p_data, theme_override=active_theme_override)
+        if family == 'watch': save_watch_templates(config.pop('_watch_templates'))
         
-        out_dir = os.path.join(OUTPUT_DIR, slug) if slug != 'home' else OUTPUT_DIR
         os.makedirs(out_dir, exist_ok=True)
-        with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
-            f.write(final_html)
+        queue_page(out_path, final_html, family)
     
     # ==========================================
     # 5. BUILD LEAGUE PAGES
@@ -927,7 +1184,18 @@ def main():
         for name, data in priorities.items():
             if name.startswith('_') or not data.get('hasLink'): continue
             
-            slug = name.lower().replace(' ', '-').replace('^[^a-z0-9]','') + "-streams"
+            slug = slugify(name) + "-streams"
+            out_path = os.path.normpath(os.path.join(OUTPUT_DIR, slug, 'index.html'))
+            deps = output_deps(config, TEMPLATE_LEAGUE, league_template_content, {
+                'config:theme_league': dep_hash(config.get('theme_league')),
+                'config:articles': dep_hash(config.get('articles')),
+                f"config:league_metadata[{name}]": dep_hash(config.get('league_metadata', {}).get(name)),
+                'year': str(datetime.datetime.now().year)
+            })
+            new_manifest[out_path] = deps
+            if not needs_rebuild(out_path, deps, manifest, full, explain):
+                skipped_families.add('league')
+                continue
             is_league = data.get('isLeague', False)
             # Entity Intelligence (Parent Sport) - RESTORED LOGIC
             parent_sport = LEAGUE_PARENT_MAP.get(name)
@@ -1025,14 +1293,18 @@ def main():
             html = html.replace('{{HERO_PILLS}}', build_menu_html(config.get('menus', {}).get('hero', []), 'hero'))
             
             # 6. Write File
-            out_dir = os.path.join(OUTPUT_DIR, slug)
-            os.makedirs(out_dir, exist_ok=True)
-            with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
-                f.write(html)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            queue_page(out_path, html, 'league')
             
             print(f"   -> Built: {slug} (Filter: {name})")
-            generate_robots(config)
-
+        generate_robots(config)
+
+    rebuilt = len(PENDING_PAGES)
+    write_pages(skipped_families)
+    save_manifest(new_manifest)
+    print(f" > Rebuilt {rebuilt} of {len(new_manifest)} outputs")
+    print_minify_report()
+    precompress_outputs(OUTPUT_DIR)
     print("✅ Build Complete.")
 
 if __name__ == "__main__":
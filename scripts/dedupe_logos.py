@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import hashlib
+from logo_variants import is_variant_file, variant_siblings, load_variants, save_variants, write_variants, get_variants
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+HASH_INDEX_PATH = 'assets/data/logo_hashes.json'
+IMAGE_MAP_PATH = 'assets/data/image_map.json'
+
+# Priority order: the first directory holding a copy keeps the canonical file
+LOGO_DIRS = [
+    'assets/logos/tsdb',
+    'assets/logos/streamed',
+    'assets/logos/upstreams',
+    'assets/logos/leagues'
+]
+
+# ==========================================
+# 2. HASH INDEX HELPERS (Shared with the downloaders)
+# ==========================================
+# Index layout:
+#   "hashes":  sha256 -> canonical file path
+#   "aliases": removed duplicate path -> canonical file path
+def load_json(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except: return {}
+    return {}
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def load_index():
+    index = load_json(HASH_INDEX_PATH)
+    if 'hashes' not in index: index['hashes'] = {}
+    if 'aliases' not in index: index['aliases'] = {}
+    return index
+
+def save_index(index):
+    os.makedirs(os.path.dirname(HASH_INDEX_PATH), exist_ok=True)
+    with open(HASH_INDEX_PATH, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+def resolve_alias(path, index):
+    """Returns the canonical path for a (possibly deduplicated) logo path, keeping the leading-slash style."""
+    if not path: return path
+    lead = '/' if path.startswith('/') else ''
+    canon = index['aliases'].get(path.lstrip('/'))
+    return f"{lead}{canon}" if canon else path
+
+def remove_with_variants(path):
+    for p in [path] + variant_siblings(path):
+        if os.path.exists(p): os.remove(p)
+
+def store_logo(data, save_path, index):
+    """
+    Writes encoded logo bytes unless an identical file already exists.
+    Returns the path that now holds the image (save_path or the canonical copy).
+    """
+    h = content_hash(data)
+    existing = index['hashes'].get(h)
+    if existing and existing != save_path and os.path.exists(existing):
+        index['aliases'][save_path] = existing
+        remove_with_variants(save_path)
+        os.utime(existing)  # Content re-verified, counts as a refresh
+        return existing
+
+    # Overwriting a refreshed file: forget the hash of its previous content
+    for old_h in [k for k, v in index['hashes'].items() if v == save_path and k != h]:
+        del index['hashes'][old_h]
+
+    with open(save_path, 'wb') as f: f.write(data)
+    index['hashes'][h] = save_path
+    index['aliases'].pop(save_path, None)
+    return save_path
+
+def store_variants(source_img, stored, save_path, variants):
+    """
+    write_variants for the path store_logo returned. On a dedup hit the
+    canonical copy keeps the siblings it already has (re-encoding them from a
+    different source would silently replace them); they are only written if
+    it has none yet.
+    """
+    if stored != save_path and get_variants(variants, stored): return
+    write_variants(source_img, stored, variants)
+
+# ==========================================
+# 3. FULL TREE DEDUPE
+# ==========================================
+def dedupe_tree(index, dry_run=False):
+    groups = {}
+    for d in LOGO_DIRS:
+        if not os.path.exists(d): continue
+        for f in sorted(os.listdir(d)):
+            if not f.endswith('.webp') or is_variant_file(f): continue
+            path = f"{d}/{f}"
+            with open(path, 'rb') as fh: groups.setdefault(content_hash(fh.read()), []).append(path)
+
+    removed = 0
+    saved_bytes = 0
+    for h, paths in groups.items():
+        # Prefer an already-canonical copy, then directory priority, then the shortest slug
+        known = index['hashes'].get(h)
+        paths.sort(key=lambda p: (p != known, LOGO_DIRS.index(os.path.dirname(p)), len(p), p))
+        canon = paths[0]
+        index['hashes'][h] = canon
+        index['aliases'].pop(canon, None)
+        for dup in paths[1:]:
+            index['aliases'][dup] = canon
+            saved_bytes += os.path.getsize(dup)
+            removed += 1
+            if not dry_run: remove_with_variants(dup)
+
+    # Re-point chained aliases and drop ones whose canonical copy disappeared
+    for alias, canon in list(index['aliases'].items()):
+        canon = index['aliases'].get(canon, canon)
+        if os.path.exists(canon): index['aliases'][alias] = canon
+        elif not dry_run: del index['aliases'][alias]
+
+    return len(groups), removed, saved_bytes
+
+def remap_image_map(index):
+    img_map = load_json(IMAGE_MAP_PATH)
+    changed = 0
+    for kind in ['teams', 'leagues']:
+        for name, path in img_map.get(kind, {}).items():
+            new_path = resolve_alias(path, index)
+            if new_path != path:
+                img_map[kind][name] = new_path
+                changed += 1
+    if changed:
+        with open(IMAGE_MAP_PATH, 'w', encoding='utf-8') as f: json.dump(img_map, f, indent=4)
+    return changed
+
+# ==========================================
+# 4. MAIN EXECUTION
+# ==========================================
+def main():
+    dry_run = '--dry-run' in sys.argv
+    print(f"--- Deduplicating Logos{' (dry run)' if dry_run else ''} ---")
+
+    index = load_index()
+    unique, removed, saved_bytes = dedupe_tree(index, dry_run)
+    print(f" > {unique} unique images, {removed} duplicates ({saved_bytes / 1024 / 1024:.1f} MB)")
+
+    if dry_run: return
+
+    changed = remap_image_map(index)
+    save_index(index)
+
+    variants = load_variants()
+    stale = [k for k in variants if k in index['aliases']]
+    for k in stale: del variants[k]
+    if stale: save_variants(variants)
+    print(f"--- Dedupe Done. Image map entries re-pointed: {changed} ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import os
+import re
+import sys
+import json
+import time
+from functools import lru_cache
+from difflib import SequenceMatcher
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Canonical team/league name handling shared by every script.
+# Alias table: display-name variant -> canonical display name, learned from
+# streamed/adstrim merges (e.g. "Man Utd" -> "Manchester United").
+# A half-matched fixture only proposes an alias; it is written to the table
+# once the same pair has been seen in ALIAS_CONFIRM_RUNS separate runs.
+# Pending candidates and removed aliases (never re-learned) live in
+# ALIAS_CANDIDATES_PATH:
+#   {"pending": {"Man Utd": {"canonical": "Manchester United", "runs": 2, "last": 1790000000}},
+#    "rejected": {"Man City": "Manchester United"}}
+# Bad aliases: python scripts/entity_names.py --forget "Man City" [...]
+ALIAS_TABLE_PATH = 'assets/data/name_aliases.json'
+ALIAS_CANDIDATES_PATH = 'assets/data/alias_candidates.json'
+ALIAS_MIN_RATIO = 0.6              # similarity needed to propose an alias from a half-matched fixture
+ALIAS_CONFIRM_RUNS = 3             # separate runs a candidate must be seen in
+ALIAS_CANDIDATE_TTL = 14 * 86400   # pending candidates not seen for this long are dropped (s)
+
+# --- WHITELIST FOR NAME CLEANING ONLY ---
+# We use this ONLY to help clean names like "NBA - Celtics".
+# We DO NOT use this to filter which teams get mapped.
+ALLOWED_LEAGUES_INPUT = """
+NFL, NBA, MLB, NHL, College Football, College-Football, College Basketball, College-Basketball,
+NCAAB, NCAAF, NCAA Men, NCAA-Men, NCAA Women, NCAA-Women, Premier League, Premier-League,
+Champions League, Champions-League, MLS, Bundesliga, Serie-A, Serie A, American-Football, American Football,
+Ice Hockey, Ice-Hockey, Championship, Scottish Premiership, Scottish-Premiership,
+Europa League, Europa-League, A League, A-League, A League Men, A League Women,
+Ligue 1, La Liga, Eredivisie, Primeira Liga, Saudi Pro League, F1, UFC, Rugby
+"""
+VALID_LEAGUES = {x.strip().lower() for x in ALLOWED_LEAGUES_INPUT.split(',') if x.strip()}
+
+def build_prefix_trie(prefixes):
+    """Char trie of lowercase prefixes; the '$' key marks the end of a complete prefix."""
+    trie = {}
+    for prefix in prefixes:
+        node = trie
+        for ch in prefix: node = node.setdefault(ch, {})
+        node['$'] = True
+    return trie
+
+LEAGUE_PREFIX_TRIE = build_prefix_trie(VALID_LEAGUES)
+
+def prefix_ends(text, trie=LEAGUE_PREFIX_TRIE):
+    """Lengths of every trie prefix of text, longest first (single O(len) scan)."""
+    ends = []
+    node = trie
+    for i, ch in enumerate(text):
+        node = node.get(ch)
+        if node is None: break
+        if '$' in node: ends.append(i + 1)
+    ends.reverse()
+    return ends
+
+# ==========================================
+# 2. NORMALIZERS (Memoized)
+# ==========================================
+@lru_cache(maxsize=65536)
+def slugify(text):
+    """File/URL slug: "Brighton & Hove Albion" -> "brighton-hove-albion" ("" when empty)."""
+    if not text: return ""
+    text = re.sub(r'[^\w\s-]', '', str(text).lower())
+    return re.sub(r'[-\s]+', '-', text).strip("-")
+
+@lru_cache(maxsize=65536)
+def normalize(text):
+    """Comparison key: lowercase ASCII alphanumerics only."""
+    if not text: return ""
+    return re.sub(r'[^a-z0-9]+', '', str(text).lower()).strip()
+
+@lru_cache(maxsize=65536)
+def clean_display_name(name):
+    """
+    Sanitizer:
+    1. PRIORITY RULE: If a colon (:) is found, assume format "League: Team"
+       and strip everything before the first colon.
+    2. FALLBACK: Check whitelist for prefixes (e.g. "NBA - Team") if no colon exists.
+    """
+    if not name: return None
+
+    # --- RULE 1: Generic Colon Stripper ---
+    # This ensures "A-League: Team A" becomes "Team A" automatically.
+    if ':' in name:
+        parts = name.split(':', 1)
+        if len(parts) > 1:
+            cleaned = parts[1].strip()
+            if cleaned and len(cleaned) > 1:
+                return cleaned
+
+    # --- RULE 2: Whitelist Fallback (longest prefix wins: "A League Men" before "A League") ---
+    for end in prefix_ends(name.lower()):
+        # Remove separator characters (spaces, hyphens) from the start
+        clean_remainder = re.sub(r"^[\s-]+", "", name[end:])
+        if clean_remainder and len(clean_remainder.strip()) > 1:
+            return clean_remainder.strip()
+    return name.strip()
+
+# ==========================================
+# 3. ALIAS TABLE
+# ==========================================
+def _load_json(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except: return {}
+    return {}
+
+ALIASES = _load_json(ALIAS_TABLE_PATH)
+_ALIAS_KEYS = {normalize(k): v for k, v in ALIASES.items()}
+CANDIDATES = _load_json(ALIAS_CANDIDATES_PATH)
+CANDIDATES.setdefault('pending', {})
+CANDIDATES.setdefault('rejected', {})
+_seen_this_run = set()
+_aliases_dirty = False
+
+@lru_cache(maxsize=65536)
+def canonical_name(name):
+    """Returns the learned canonical display name for a variant (or the name itself)."""
+    if not name: return name
+    return _ALIAS_KEYS.get(normalize(name), name)
+
+def canonical_key(name):
+    return normalize(canonical_name(name))
+
+def names_equal(a, b):
+    if not a or not b: return False
+    return canonical_key(a) == canonical_key(b)
+
+def names_similar(a, b):
+    """Loose check used only to learn new aliases when the other team already matched."""
+    ka, kb = canonical_key(a), canonical_key(b)
+    if not ka or not kb: return False
+    if ka in kb or kb in ka: return True
+    return SequenceMatcher(None, ka, kb).ratio() >= ALIAS_MIN_RATIO
+
+def learn_alias(variant, canonical):
+    global _aliases_dirty
+    if not variant or not canonical or names_equal(variant, canonical): return
+    canonical = canonical_name(canonical)  # never chain aliases
+    ALIASES[variant] = canonical
+    _ALIAS_KEYS[normalize(variant)] = canonical
+    canonical_name.cache_clear()
+    _aliases_dirty = True
+
+def propose_alias(variant, canonical, now):
+    """
+    One sighting of variant naming the same team as canonical. Counts once per
+    run; the alias is learned after ALIAS_CONFIRM_RUNS runs agreeing on the
+    canonical name. Returns True when this sighting confirmed it.
+    """
+    global _aliases_dirty
+    if not variant or not canonical or names_equal(variant, canonical): return False
+    canonical = canonical_name(canonical)
+    if normalize(CANDIDATES['rejected'].get(variant)) == normalize(canonical): return False
+    pending = CANDIDATES['pending']
+    entry = pending.get(variant)
+    if not entry or normalize(entry['canonical']) != normalize(canonical):
+        entry = pending[variant] = {'canonical': canonical, 'runs': 0}
+    if variant not in _seen_this_run:
+        _seen_this_run.add(variant)
+        entry['runs'] += 1
+    entry['last'] = int(now)
+    _aliases_dirty = True
+    if entry['runs'] < ALIAS_CONFIRM_RUNS: return False
+    del pending[variant]
+    learn_alias(variant, canonical)
+    return True
+
+def forget_alias(variant):
+    """Drops a learned alias (or pending candidate) and keeps it from being learned again."""
+    global _aliases_dirty
+    key = normalize(variant)
+    removed = [k for k in ALIASES if normalize(k) == key] + [k for k in CANDIDATES['pending'] if normalize(k) == key]
+    for k in removed:
+        canonical = ALIASES.pop(k, None) or CANDIDATES['pending'].pop(k)['canonical']
+        CANDIDATES['rejected'][k] = canonical
+    _ALIAS_KEYS.clear()
+    _ALIAS_KEYS.update({normalize(k): v for k, v in ALIASES.items()})
+    canonical_name.cache_clear()
+    if removed: _aliases_dirty = True
+    return removed
+
+def save_aliases(now=None):
+    if not _aliases_dirty: return
+    now = time.time() if now is None else now
+    pending = CANDIDATES['pending']
+    for k in [k for k, e in pending.items() if e.get('last', 0) + ALIAS_CANDIDATE_TTL < now]: del pending[k]
+    for path, data in ((ALIAS_TABLE_PATH, ALIASES), (ALIAS_CANDIDATES_PATH, CANDIDATES)):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+def lookup(name, mapping):
+    """mapping[name], falling back to the entry for the name's canonical alias."""
+    if not name: return None
+    if name in mapping: return mapping[name]
+    return mapping.get(canonical_name(name))
+
+# ==========================================
+# 4. BENCHMARK (python scripts/entity_names.py --bench)
+# ==========================================
+def _clean_by_scan(name):
+    """Previous implementation: startswith over the whole set, order-dependent."""
+    if ':' in name:
+        cleaned = name.split(':', 1)[1].strip()
+        if cleaned and len(cleaned) > 1: return cleaned
+    lower_name = name.lower()
+    for league in VALID_LEAGUES:
+        if lower_name.startswith(league):
+            clean_remainder = re.sub(r"^[\s-]+", "", name[len(league):])
+            if clean_remainder and len(clean_remainder.strip()) > 1:
+                return clean_remainder.strip()
+    return name.strip()
+
+def benchmark(rounds=20):
+    from backend_snapshot import load_snapshot
+    names = [m[k] for m in load_snapshot() for k in ('home_team', 'away_team') if m.get(k)]
+    if not names:
+        print(" > No names in backend snapshot")
+        return
+    trie_clean = clean_display_name.__wrapped__  # time the trie, not the memo cache
+
+    results = {}
+    for label, fn in [('set scan', _clean_by_scan), ('prefix trie', trie_clean)]:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for n in names: fn(n)
+        results[label] = time.perf_counter() - start
+        per_name = results[label] / (rounds * len(names)) * 1e6
+        print(f"   - {label}: {results[label] * 1000:.1f} ms ({per_name:.2f} us/name)")
+
+    changed = sum(1 for n in names if _clean_by_scan(n) != trie_clean(n))
+    print(f" > {len(names)} names x {rounds} rounds, speedup {results['set scan'] / results['prefix trie']:.1f}x, {changed} names cleaned differently")
+
+if __name__ == "__main__":
+    if '--bench' in sys.argv:
+        print("--- clean_display_name Benchmark ---")
+        benchmark()
+    elif '--forget' in sys.argv:
+        names = sys.argv[sys.argv.index('--forget') + 1:]
+        rejected = CANDIDATES['rejected']
+        for name in names:
+            removed = forget_alias(name)
+            if not removed: print(f" > {name}: no such alias")
+            for k in removed: print(f" > Forgot {k} -> {rejected[k]}")
+        save_aliases()
+    elif '--aliases' in sys.argv:
+        print(f"--- {len(ALIASES)} aliases, {len(CANDIDATES['pending'])} pending ---")
+        for k, v in sorted(ALIASES.items()): print(f"   - {k} -> {v}")
+        for k, e in sorted(CANDIDATES['pending'].items()): print(f"   ? {k} -> {e['canonical']} ({e['runs']}/{ALIAS_CONFIRM_RUNS} runs)")
@@ -1,14 +1,16 @@
 import os
 import requests
-import re
 import time
 from PIL import Image
 from io import BytesIO
+from dedupe_logos import load_index, save_index, store_logo, store_variants, resolve_alias
+from logo_variants import load_variants, save_variants
+from entity_names import slugify
+from backend_snapshot import load_snapshot
 
 # ==========================================
 # 1. CONFIGURATION
 # ==========================================
-BACKEND_URL = "https://vercelapi-olive.vercel.app/api/sync-nodes?country=us"
 STREAMED_HASH_BASE = "https://streamed.pk/api/images/badge/"
 
 # Directories
@@ -23,59 +25,21 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
-# --- WHITELIST FOR CLEANING ONLY ---
-ALLOWED_LEAGUES_INPUT = """
-NFL, NBA, MLB, NHL, College Football, College-Football, College Basketball, College-Basketball, 
-NCAAB, NCAAF, NCAA Men, NCAA-Men, NCAA Women, NCAA-Women, Premier League, Premier-League, 
-Champions League, Champions-League, MLS, Bundesliga, Serie-A, Serie A, American-Football, American Football, 
-Ice Hockey, Ice-Hockey, Championship, Scottish Premiership, Scottish-Premiership, 
-Europa League, Europa-League, A League, A-League, A League Men, A League Women, 
-Ligue 1, La Liga, Eredivisie, Primeira Liga, Saudi Pro League, F1, UFC, Rugby
-"""
-VALID_LEAGUES = {x.strip().lower() for x in ALLOWED_LEAGUES_INPUT.split(',') if x.strip()}
-
 # ==========================================
 # 2. UTILS
 # ==========================================
-def slugify(name):
-    if not name: return None
-    clean = str(name).lower()
-    clean = re.sub(r"[^\w\s-]", "", clean)
-    clean = re.sub(r"\s+", "-", clean)
-    return clean.strip("-")
-
-def clean_display_name(name):
-    """
-    Sanitizer: Priority Colon Rule -> Whitelist Fallback
-    """
-    if not name: return None
-    
-    # Rule 1: Colon
-    if ':' in name:
-        parts = name.split(':', 1)
-        if len(parts) > 1:
-            cleaned = parts[1].strip()
-            if cleaned and len(cleaned) > 1:
-                return cleaned
-
-    # Rule 2: Whitelist
-    lower_name = name.lower()
-    for league in VALID_LEAGUES:
-        if lower_name.startswith(league):
-            remainder = name[len(league):]
-            clean_remainder = re.sub(r"^[\s-]+", "", remainder)
-            if clean_remainder and len(clean_remainder.strip()) > 1:
-                return clean_remainder.strip()
-                
-    return name.strip()
-
 def resolve_url(source_val):
     if not source_val: return None
     if source_val.startswith("http"):
         return source_val
     return f"{STREAMED_HASH_BASE}{source_val}.webp"
 
+# Content-hash index: identical badges are stored once (see dedupe_logos.py)
+HASH_INDEX = load_index()
+LOGO_VARIANTS = load_variants()
+
 def should_download(path):
+    path = resolve_alias(path, HASH_INDEX)
     if not os.path.exists(path): return True
     file_age_days = (time.time() - os.path.getmtime(path)) / (24 * 3600)
     return file_age_days > REFRESH_DAYS
@@ -100,13 +64,14 @@ def download_multi_source(source_obj, save_path):
             if resp.status_code == 200:
                 img = Image.open(BytesIO(resp.content))
                 if img.mode != 'RGBA': img = img.convert('RGBA')
+                src = img
                 img = img.resize((60, 60), Image.Resampling.LANCZOS)
                 
                 temp_buffer = BytesIO()
                 img.save(temp_buffer, "WEBP", quality=90, method=6)
                 
-                with open(save_path, "wb") as f:
-                    f.write(temp_buffer.getvalue())
+                stored = store_logo(temp_buffer.getvalue(), save_path, HASH_INDEX)
+                store_variants(src, stored, save_path, LOGO_VARIANTS)
                 return True
         except:
             continue
@@ -122,8 +87,7 @@ def main():
     print("--- Starting Backend Asset Sync (All Teams) ---")
     
     try:
-        data = requests.get(BACKEND_URL, headers=HEADERS).json()
-        matches = data.get('matches', [])
+        matches = load_snapshot()
     except Exception as e:
         print(f"CRITICAL: Backend unavailable - {e}")
         return
@@ -132,8 +96,8 @@ def main():
     league_count = 0
 
     for m in matches:
-        home_raw = m.get('home_team')
-        away_raw = m.get('away_team')
+        home_name = m.get('home_clean')
+        away_name = m.get('away_clean')
         league_raw = m.get('league') 
         
         home_imgs = m.get('home_team_image')
@@ -141,14 +105,13 @@ def main():
         league_imgs = m.get('league_image')
 
         # PROCESS TEAMS
-        for raw_name, img_obj in [(home_raw, home_imgs), (away_raw, away_imgs)]:
-            name = clean_display_name(raw_name)
+        for name, img_obj in [(home_name, home_imgs), (away_name, away_imgs)]:
             slug = slugify(name)
             if not slug: continue
 
             # Check TSDB first
             tsdb_path = os.path.join(TSDB_DIR, f"{slug}.webp")
-            if not os.path.exists(tsdb_path):
+            if not os.path.exists(resolve_alias(tsdb_path, HASH_INDEX)):
                 streamed_path = os.path.join(STREAMED_DIR, f"{slug}.webp")
                 if img_obj and download_multi_source(img_obj, streamed_path):
                     team_count += 1
@@ -161,6 +124,8 @@ def main():
                 if download_multi_source(league_imgs, l_path):
                     league_count += 1
 
+    save_index(HASH_INDEX)
+    save_variants(LOGO_VARIANTS)
     print(f"--- Sync Done. Teams: {team_count} | Leagues: {league_count} ---")
 
 if __name__ == "__main__":
@@ -1,10 +1,15 @@
 import os
 import requests
 import urllib.parse
-import re
+import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 from io import BytesIO
+from dedupe_logos import load_index, save_index, store_logo, store_variants, resolve_alias
+from logo_variants import load_variants, save_variants
+from entity_names import slugify
 
 # ==========================================
 # 1. CONFIGURATION
@@ -14,6 +19,17 @@ BASE_URL = f"https://www.thesportsdb.com/api/v1/json/{API_KEY}"
 SAVE_DIR = "assets/logos/tsdb"
 REFRESH_DAYS = 60
 
+# Team-list responses are persisted so re-runs inside REFRESH_DAYS skip the API
+TEAMS_CACHE_PATH = "assets/data/tsdb_teams.json"
+
+# TSDB rate limit (free key: 30 requests / minute). Enforced by a token bucket;
+# a burst of 1 means requests are spaced evenly and never exceed the limit.
+RATE_LIMIT = 30
+RATE_WINDOW = 60
+RATE_BURST = 1
+LEAGUE_WORKERS = 4   # concurrent league queries (all share the bucket)
+IMAGE_WORKERS = 8    # badge downloads + resizes (CDN, not rate limited)
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
@@ -59,14 +75,42 @@ LEAGUES = {
 # ==========================================
 # 2. UTILS
 # ==========================================
-def slugify(name):
-    if not name: return None
-    clean = str(name).lower()
-    clean = re.sub(r"[^\w\s-]", "", clean)
-    clean = re.sub(r"\s+", "-", clean)
-    return clean.strip("-")
+class TokenBucket:
+    """Thread-safe token bucket: take() blocks until a request may be sent."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def load_json(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except: return {}
+    return {}
+
+# Content-hash index: identical badges are stored once (see dedupe_logos.py)
+HASH_INDEX = load_index()
+LOGO_VARIANTS = load_variants()
+STORE_LOCK = threading.Lock()  # store_logo() walks the shared index
+VARIANTS_CLAIMED = set()       # canonical logos whose @2x/.avif siblings a worker already writes this run
 
 def should_download(path):
+    path = resolve_alias(path, HASH_INDEX)
     if not os.path.exists(path): return True
     file_age_days = (time.time() - os.path.getmtime(path)) / (24 * 3600)
     return file_age_days > REFRESH_DAYS
@@ -77,18 +121,44 @@ def save_image_optimized(url, save_path):
         if resp.status_code == 200:
             img = Image.open(BytesIO(resp.content))
             if img.mode != 'RGBA': img = img.convert('RGBA')
+            src = img
             img = img.resize((60, 60), Image.Resampling.LANCZOS)
             
             temp_buffer = BytesIO()
             img.save(temp_buffer, "WEBP", quality=90, method=6)
             
-            with open(save_path, "wb") as f:
-                f.write(temp_buffer.getvalue())
+            with STORE_LOCK:
+                stored = store_logo(temp_buffer.getvalue(), save_path, HASH_INDEX)
+                # Claimed under the lock: two dedup hits on one canonical file would
+                # otherwise both find no siblings and encode them at the same time
+                first = stored not in VARIANTS_CLAIMED
+                VARIANTS_CLAIMED.add(stored)
+            if first: store_variants(src, stored, save_path, LOGO_VARIANTS)
             return True
     except: 
         pass
     return False
 
+def fetch_league_teams(tsdb_name, bucket, cache):
+    """Returns [(name, badge_url)] for a league, from cache when still fresh."""
+    cached = cache.get(tsdb_name)
+    if cached and (time.time() - cached.get('fetched', 0)) / (24 * 3600) < REFRESH_DAYS:
+        return cached['teams'], True
+
+    bucket.take()
+    encoded = urllib.parse.quote(tsdb_name)
+    url = f"{BASE_URL}/search_all_teams.php?l={encoded}"
+    resp = requests.get(url, headers=HEADERS, timeout=10)
+    data = resp.json()
+
+    teams = []
+    for t in (data or {}).get('teams') or []:
+        name = t.get('strTeam')
+        badge = t.get('strTeamBadge') or t.get('strBadge')
+        if name and badge: teams.append([name, badge])
+    if teams: cache[tsdb_name] = {'fetched': int(time.time()), 'teams': teams}
+    return teams, False
+
 # ==========================================
 # 3. MAIN EXECUTION
 # ==========================================
@@ -96,46 +166,51 @@ def main():
     os.makedirs(SAVE_DIR, exist_ok=True)
     print("--- Starting TSDB Harvester (Image Only) ---")
 
+    cache = load_json(TEAMS_CACHE_PATH)
+    bucket = TokenBucket(RATE_LIMIT / RATE_WINDOW, RATE_BURST)
+
+    # Whitelist Check + one query per distinct TSDB league (A League / A League Men share one)
+    queries = {}
     for display_name, tsdb_name in LEAGUES.items():
-        # Whitelist Check
-        if display_name.lower() not in VALID_LEAGUES:
-            continue
-
-        print(f" > Checking: {display_name}")
-        encoded = urllib.parse.quote(tsdb_name)
-        url = f"{BASE_URL}/search_all_teams.php?l={encoded}"
-        
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=10)
-            data = resp.json()
-            
-            if data and data.get('teams'):
-                count = 0
-                for t in data['teams']:
-                    name = t.get('strTeam')
-                    if name:
-                        slug = slugify(name)
-                        if slug:
-                            # Note: NO league_map logic here.
-                            
-                            # Download Image
-                            badge = t.get('strTeamBadge') or t.get('strBadge')
-                            if badge:
-                                path = os.path.join(SAVE_DIR, f"{slug}.webp")
-                                if should_download(path):
-                                    if save_image_optimized(badge, path):
-                                        count += 1
-                
-                if count > 0: print(f"   [+] Processed {count} updates.")
-            else:
+        if display_name.lower() in VALID_LEAGUES: queries.setdefault(tsdb_name, display_name)
+
+    queued = set()
+    with ThreadPoolExecutor(max_workers=LEAGUE_WORKERS) as league_pool, \
+         ThreadPoolExecutor(max_workers=IMAGE_WORKERS) as image_pool:
+        league_jobs = {league_pool.submit(fetch_league_teams, q, bucket, cache): q for q in queries}
+        image_jobs = {}
+
+        for future in as_completed(league_jobs):
+            tsdb_name = league_jobs[future]
+            display_name = queries[tsdb_name]
+            try:
+                teams, from_cache = future.result()
+            except Exception as e:
+                print(f"   [!] Error ({display_name}): {e}")
+                continue
+            if not teams:
                 print(f"   [-] No teams found for {tsdb_name}")
+                continue
+            print(f" > Checking: {display_name} ({len(teams)} teams{', cached' if from_cache else ''})")
+
+            # Note: NO league_map logic here.
+            for name, badge in teams:
+                slug = slugify(name)
+                if not slug: continue
+                path = os.path.join(SAVE_DIR, f"{slug}.webp")
+                if path in queued or not should_download(path): continue
+                queued.add(path)
+                image_jobs[image_pool.submit(save_image_optimized, badge, path)] = path
+
+        updated = 0
+        for future in as_completed(image_jobs):
+            if future.result(): updated += 1
 
-        except Exception as e:
-            print(f"   [!] Error: {e}")
-        
-        time.sleep(1.2)
-    
-    print("--- TSDB Sync Complete ---")
+    with open(TEAMS_CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True, ensure_ascii=False)
+    save_index(HASH_INDEX)
+    save_variants(LOGO_VARIANTS)
+    print(f"--- TSDB Sync Complete. Badges updated: {updated} ---")
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,13 @@
 import os
 import json
-import requests
-import re
 from difflib import get_close_matches
+from dedupe_logos import load_index
+from backend_snapshot import load_snapshot
+from entity_names import slugify, canonical_name, ALIASES
 
 # ==========================================
 # 1. CONFIGURATION
 # ==========================================
-BACKEND_URL = "https://vercelapi-olive.vercel.app/api/sync-nodes?country=us"
 DIRS = {
     'tsdb': 'assets/logos/tsdb',
     'streamed': 'assets/logos/streamed',
@@ -16,51 +16,9 @@ DIRS = {
 OUTPUT_FILE = 'assets/data/image_map.json'
 FUZZY_CUTOFF = 0.85 
 
-# --- WHITELIST FOR NAME CLEANING ONLY ---
-# We use this ONLY to help clean names like "NBA - Celtics".
-# We DO NOT use this to filter which teams get mapped.
-ALLOWED_LEAGUES_INPUT = """
-NFL, NBA, MLB, NHL, College Football, College-Football, College Basketball, College-Basketball, 
-NCAAB, NCAAF, NCAA Men, NCAA-Men, NCAA Women, NCAA-Women, Premier League, Premier-League, 
-Champions League, Champions-League, MLS, Bundesliga, Serie-A, Serie A, American-Football, American Football, 
-Ice Hockey, Ice-Hockey, Championship, Scottish Premiership, Scottish-Premiership, 
-Europa League, Europa-League, A League, A-League, A League Men, A League Women, 
-Ligue 1, La Liga, Eredivisie, Primeira Liga, Saudi Pro League, F1, UFC, Rugby
-"""
-VALID_LEAGUES = {x.strip().lower() for x in ALLOWED_LEAGUES_INPUT.split(',') if x.strip()}
-
 # ==========================================
 # 2. HELPER FUNCTIONS
 # ==========================================
-def clean_display_name(name):
-    """
-    Sanitizer:
-    1. PRIORITY RULE: If a colon (:) is found, assume format "League: Team" 
-       and strip everything before the first colon.
-    2. FALLBACK: Check whitelist for prefixes (e.g. "NBA - Team") if no colon exists.
-    """
-    if not name: return None
-    
-    # --- RULE 1: Generic Colon Stripper ---
-    # This ensures "A-League: Team A" becomes "Team A" automatically.
-    if ':' in name:
-        parts = name.split(':', 1)
-        if len(parts) > 1:
-            cleaned = parts[1].strip()
-            if cleaned and len(cleaned) > 1:
-                return cleaned
-
-    # --- RULE 2: Whitelist Fallback ---
-    lower_name = name.lower()
-    for league in VALID_LEAGUES:
-        if lower_name.startswith(league):
-            remainder = name[len(league):]
-            # Remove separator characters (spaces, hyphens) from the start
-            clean_remainder = re.sub(r"^[\s-]+", "", remainder)
-            if clean_remainder and len(clean_remainder.strip()) > 1:
-                return clean_remainder.strip()
-    return name.strip()
-
 def make_pretty_name(slug):
     """
     Converts a filename slug back to a human-readable title.
@@ -100,6 +58,18 @@ def main():
                 slug = f.replace('.webp', '')
                 league_paths[slug] = f"/{DIRS['leagues']}/{f}"
 
+    # Load Deduplicated Aliases (removed byte-identical copies -> canonical file)
+    aliases = load_index()['aliases']
+    for alias, canon in aliases.items():
+        a_dir, f = os.path.split(alias)
+        slug = f.replace('.webp', '')
+        if a_dir == DIRS['leagues']:
+            if slug not in league_paths: league_paths[slug] = f"/{canon}"
+        elif a_dir in (DIRS['tsdb'], DIRS['streamed']):
+            # Respect TSDB > Streamed priority of the original file location
+            if slug not in slug_to_path or (a_dir == DIRS['tsdb'] and DIRS['tsdb'] not in slug_to_path[slug]):
+                slug_to_path[slug] = f"/{canon}"
+
     # 2. Build Initial Map from Files
     final_teams = {}
     final_leagues = {}
@@ -117,8 +87,7 @@ def main():
     # 3. Fetch Backend Matches (To map specific API names)
     print(" > Fetching backend matches to map live names...")
     try:
-        data = requests.get(BACKEND_URL, timeout=10).json()
-        matches = data.get('matches', [])
+        matches = load_snapshot()
     except Exception as e:
         print(f"   [!] Backend fetch failed: {e}")
         matches = []
@@ -135,11 +104,13 @@ def main():
             raw_name = m.get(t_key)
             if not raw_name: continue
             
-            # A. Clean the name (Handles "A-League: Team A" -> "Team A")
-            clean_name = clean_display_name(raw_name)
+            # A. Clean name, precomputed by the snapshot (Handles "A-League: Team A" -> "Team A")
+            clean_name = m.get(t_key.replace('_team', '_clean')) or raw_name
             
             # B. Generate Slug from Clean Name
-            search_slug = "".join([c for c in clean_name.lower() if c.isalnum() or c == '-']).strip('-')
+            search_slug = slugify(clean_name)
+            # Learned alias ("Man Utd" -> "Manchester United") when the raw slug has no file
+            if search_slug not in slug_to_path: search_slug = slugify(canonical_name(clean_name))
             
             # C. Try to match file
             if search_slug in slug_to_path:
@@ -157,10 +128,15 @@ def main():
 
         # Map League
         if league_name:
-            l_slug = "".join([c for c in league_name.lower() if c.isalnum() or c == '-']).strip('-')
+            l_slug = slugify(league_name)
             if l_slug in league_paths:
                 final_leagues[league_name] = league_paths[l_slug]
 
+    # Learned Aliases: every known variant resolves exactly, not via fuzzy/fallback
+    for variant, canon in ALIASES.items():
+        if canon in final_teams and variant not in final_teams:
+            final_teams[variant] = final_teams[canon]
+
     # 4. Save
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
     with open(OUTPUT_FILE, 'w') as f:
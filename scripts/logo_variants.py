@@ -0,0 +1,78 @@
+import os
+import json
+from PIL import Image
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Tracks which hi-DPI / AVIF siblings exist for each stored 1x logo:
+#   "assets/logos/streamed/x.webp": {"webp": [1, 2], "avif": [1, 2]}
+VARIANTS_PATH = 'assets/data/logo_variants.json'
+BASE_SIZE = 60
+SCALES = [1, 2]
+AVIF_QUALITY = 60
+
+# AVIF needs Pillow >= 11.2 (or the pillow-avif-plugin); fall back to WEBP only
+Image.init()
+AVIF_SUPPORTED = 'AVIF' in Image.SAVE
+
+# ==========================================
+# 2. HELPERS
+# ==========================================
+def load_json(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except: return {}
+    return {}
+
+def variant_path(path, fmt, scale):
+    """'/a/x.webp', 'avif', 2 -> '/a/x@2x.avif'"""
+    stem = os.path.splitext(path)[0]
+    suffix = f"@{scale}x" if scale > 1 else ""
+    return f"{stem}{suffix}.{fmt}"
+
+def is_variant_file(fname):
+    return fname.endswith('.avif') or os.path.splitext(fname)[0].endswith(tuple(f"@{s}x" for s in SCALES[1:]))
+
+def variant_siblings(path):
+    """Every sibling file write_variants() may have created for a 1x logo."""
+    return [variant_path(path, fmt, scale) for fmt in ('webp', 'avif') for scale in SCALES if (fmt, scale) != ('webp', 1)]
+
+def load_variants():
+    return load_json(VARIANTS_PATH)
+
+def save_variants(variants):
+    os.makedirs(os.path.dirname(VARIANTS_PATH), exist_ok=True)
+    with open(VARIANTS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(variants, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+def get_variants(variants, path):
+    return variants.get(path.lstrip('/'), {}) if path else {}
+
+def write_variants(source_img, path, variants):
+    """
+    Writes the 2x WEBP and 1x/2x AVIF siblings of a stored 1x logo.
+    Always resizes from the full-size source image, never from the 60px copy,
+    and skips scales the source is too small to fill.
+    """
+    key = path.lstrip('/')
+    img = source_img if source_img.mode == 'RGBA' else source_img.convert('RGBA')
+    src_size = min(img.size)
+    entry = {'webp': [1]}
+
+    for scale in SCALES:
+        size = BASE_SIZE * scale
+        if scale > 1 and src_size < size: continue
+        resized = img.resize((size, size), Image.Resampling.LANCZOS)
+        try:
+            if scale > 1:
+                resized.save(variant_path(key, 'webp', scale), 'WEBP', quality=90, method=6)
+                entry['webp'].append(scale)
+            if AVIF_SUPPORTED:
+                resized.save(variant_path(key, 'avif', scale), 'AVIF', quality=AVIF_QUALITY)
+                entry.setdefault('avif', []).append(scale)
+        except: continue
+
+    variants[key] = entry
+    return entry
@@ -1,15 +1,38 @@
 import os
+import sys
 import json
 import requests
 import hashlib
 import base64
 import time
+import threading
 import re
+import math
+import glob
 import urllib.parse
+import shutil
+from html import escape
+
+# Peak RSS report is Unix-only
+try:
+    import resource
+except ImportError:
+    resource = None
 from datetime import datetime, timezone, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
 from PIL import Image
 from io import BytesIO
+from dedupe_logos import load_index, save_index, store_logo, store_variants
+from logo_variants import load_variants, save_variants, get_variants, variant_path
+from precompress import precompress_outputs
+from minify_html import MINIFY_STATS, minify_html, write_minified, write_minified_parts, print_minify_report
+from match_model import Match, Stream
+from search_index import write_search_index
+from match_identity import load_identity, save_identity, assign_stable_ids, known_ids
+from match_diff import SLATE_STATE_PATH, load_json as load_state, save_json as save_state, digest, match_record, diff_slates, dirty_ids, summarize, append_change_log
+from pipeline import run_stages, report_stages, PIPELINE_WORKERS
+from entity_names import slugify, normalize, canonical_key, names_equal, names_similar, propose_alias, save_aliases, lookup
 
 # ==============================================================================
 # 1. CONFIGURATION & CONSTANTS
@@ -19,6 +42,15 @@ IMAGE_MAP_PATH = 'assets/data/image_map.json'
 LEAGUE_MAP_PATH = 'assets/data/league_map.json'
 OUTPUT_DIR = '.' 
 
+# Output growth guard: a page that grows past GROWTH_LIMIT x the size this
+# engine last wrote (and by more than GROWTH_MIN_BYTES) is not written (the
+# previous file stays in place) and fails the run.
+# The baseline is recorded, not read off disk, because build_site resets pages
+# to their small empty-list form. --allow-growth overrides.
+OUTPUT_SIZES_PATH = 'assets/data/output_sizes.json'
+GROWTH_LIMIT = 1.5
+GROWTH_MIN_BYTES = 64 * 1024
+
 # API ENDPOINTS
 NODE_A_ENDPOINT = 'https://streamed.pk/api'
 ADSTRIM_ENDPOINT = 'https://beta.adstrim.ru/api/events'
@@ -113,11 +145,6 @@ def hex_to_rgba(hex_code, opacity):
     except:
         return hex_code
 
-def slugify(text):
-    if not text: return ""
-    text = re.sub(r'[^\w\s-]', '', str(text).lower())
-    return re.sub(r'[-\s]+', '-', text).strip("-")
-
 # Load Configs
 config = load_json(CONFIG_PATH)
 image_map = load_json(IMAGE_MAP_PATH)
@@ -125,6 +152,11 @@ if 'teams' not in image_map: image_map['teams'] = {}
 if 'leagues' not in image_map: image_map['leagues'] = {}
 
 LEAGUE_MAP = load_json(LEAGUE_MAP_PATH) # Loaded directly for logic use
+# Canonical team keys per league, built once instead of per match
+LEAGUE_TEAM_KEYS = {league: {canonical_key(t) for t in teams} for league, teams in LEAGUE_MAP.items() if isinstance(teams, list)}
+KNOWN_TEAM_KEYS = set().union(*LEAGUE_TEAM_KEYS.values())
+LOGO_VARIANTS = load_variants() # Hi-DPI / AVIF siblings per stored logo
+IDENTITY_INDEX = load_identity() # fingerprint -> first-assigned match ids
 
 SITE_SETTINGS = config.get('site_settings', {})
 TARGET_COUNTRY = SITE_SETTINGS.get('target_country', 'US')
@@ -133,15 +165,12 @@ DOMAIN = SITE_SETTINGS.get('domain', 'example.com')
 PARAM_LIVE = SITE_SETTINGS.get('param_live', 'stream')
 PARAM_INFO = SITE_SETTINGS.get('param_info', 'info')
 THEME = config.get('theme', {})
+SECTION_PAGE_ROWS = max(1, int(SITE_SETTINGS.get('section_page_rows') or 20))  # rows per section before Show More
 
 # ==============================================================================
 # 3. MATCH PROCESSING LOGIC (PRESERVED EXACTLY)
 # ==============================================================================
 
-def normalize(s):
-    if not s: return ""
-    return re.sub(r'[^a-z0-9]+', '', str(s).lower()).strip()
-
 def extract_teams(match):
     title = match.get('title') or ""
     parts = [p.strip() for p in title.split(":")]
@@ -170,11 +199,10 @@ def resolve_league(match):
     home = teams.get('home', {}).get('name')
     away = teams.get('away', {}).get('name')
     if home and away:
-        h_norm = normalize(home)
-        a_norm = normalize(away)
-        for league, team_list in LEAGUE_MAP.items():
-            normalized_list = [normalize(t) for t in team_list] if isinstance(team_list, list) else []
-            if h_norm in normalized_list and a_norm in normalized_list:
+        h_norm = canonical_key(home)
+        a_norm = canonical_key(away)
+        for league, team_keys in LEAGUE_TEAM_KEYS.items():
+            if h_norm in team_keys and a_norm in team_keys:
                 match['league'] = league
                 match['_leagueSource'] = "map"
                 return
@@ -199,11 +227,26 @@ def resolve_league(match):
 
 def teams_match(a, b):
     if not a or not b: return False
-    ah = normalize(a.get('home'))
-    aa = normalize(a.get('away'))
-    bh = normalize(b.get('home'))
-    ba = normalize(b.get('away'))
-    return (ah == bh and aa == ba) or (ah == ba and aa == bh)
+    ah, aa, bh, ba = a.get('home'), a.get('away'), b.get('home'), b.get('away')
+    return (names_equal(ah, bh) and names_equal(aa, ba)) or (names_equal(ah, ba) and names_equal(aa, bh))
+
+def half_match(a, b):
+    """One team identical and the other merely similar: returns the (variant, canonical) alias to learn."""
+    for bh, ba in [(b.get('home'), b.get('away')), (b.get('away'), b.get('home'))]:
+        if names_equal(a.get('home'), bh) and names_similar(a.get('away'), ba): return (ba, a.get('away'))
+        if names_equal(a.get('away'), ba) and names_similar(a.get('home'), bh): return (bh, a.get('home'))
+    return None
+
+def confirms_alias(sm, am, alias):
+    """
+    Stricter than the half match that merged the fixture: both feeds name the
+    same league, and the two spellings are not two different teams the league
+    map already knows ("Manchester United" / "Manchester City").
+    """
+    l1, l2 = normalize(sm.get('league')), normalize(am.get('league'))
+    if not l1 or not l2 or (l1 not in l2 and l2 not in l1): return False
+    variant, canonical = alias
+    return not (canonical_key(variant) in KNOWN_TEAM_KEYS and canonical_key(canonical) in KNOWN_TEAM_KEYS)
 
 def titles_match(t1, t2):
     if not t1 or not t2: return False
@@ -220,6 +263,7 @@ def merge_matches(streamed_list, adstrim_list):
     
     for sm in streamed_list:
         found_am = None
+        half = None  # Fallback candidate when no fixture matches both teams
         sm_date = sm.get('date', 0)
         sm_ms = sm_date * 1000 if sm_date < 10000000000 else sm_date
         sm_sport = normalize(sm.get('category'))
@@ -241,6 +285,9 @@ def merge_matches(streamed_list, adstrim_list):
                 t1 = {'home': sm_h_name, 'away': sm_a_name}
                 t2 = {'home': am_h, 'away': am_a}
                 if teams_match(t1, t2): matched = True
+                elif half is None:
+                    alias = half_match(t1, t2)
+                    if alias: half = (i, am, alias)
             else:
                 t1_title = sm.get('title_clean') or sm.get('title')
                 t2_title = am.get('title')
@@ -249,6 +296,11 @@ def merge_matches(streamed_list, adstrim_list):
                 found_am = am
                 used_adstrim_indices.add(i)
                 break
+        if not found_am and half:
+            # Same kickoff, same sport, one identical team: a sighting of the other name as an alias
+            i, found_am, alias = half
+            used_adstrim_indices.add(i)
+            if confirms_alias(sm, found_am, alias): propose_alias(*alias, now_ts())
         merged.append({'sm': sm, 'am': found_am})
         
     for i, am in enumerate(adstrim_list):
@@ -259,22 +311,61 @@ def merge_matches(streamed_list, adstrim_list):
 # ==============================================================================
 # 4. DATA FETCHING & PROCESSING ENGINE
 # ==============================================================================
+# --- RECORD / REPLAY ---
+# --record DIR saves every upstream JSON response of a run (plus the run time);
+# --replay DIR feeds those files back with the clock pinned to the recorded
+# time, so a full pipeline run is deterministic and needs no network.
+RECORD_DIR = None
+REPLAY_DIR = None
+RUN_META_FILE = '_run.json'
+CLOCK = time.time  # Injectable: every "now" in the engine goes through now_ts()
+
+def now_ts():
+    return CLOCK()
+
+def upstream_path(directory, key):
+    return os.path.join(directory, re.sub(r'[^\w.-]+', '_', key) + '.json')
+
+def fetch_upstream(key, url, timeout):
+    """GET url as JSON. Raises on failure, so callers keep their fallbacks in every mode."""
+    if REPLAY_DIR:
+        with open(upstream_path(REPLAY_DIR, key), 'r', encoding='utf-8') as f: return json.load(f)
+    r = requests.get(url, headers=HEADERS, timeout=timeout)
+    if r.status_code != 200: raise IOError(f"HTTP {r.status_code}")
+    data = r.json()
+    if RECORD_DIR:
+        with open(upstream_path(RECORD_DIR, key), 'w', encoding='utf-8') as f: json.dump(data, f)
+    return data
+
+def start_recording(directory):
+    global RECORD_DIR
+    RECORD_DIR = directory
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, RUN_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'recorded_at': now_ts()}, f)
+    print(f" > Recording upstream responses to {directory}")
+
+def start_replay(directory, at=None):
+    global REPLAY_DIR, CLOCK
+    REPLAY_DIR = directory
+    meta = load_json(os.path.join(directory, RUN_META_FILE))
+    fixed = float(at) if at else meta.get('recorded_at', time.time())
+    CLOCK = lambda: fixed
+    print(f" > Replaying {directory} at {datetime.fromtimestamp(fixed, timezone.utc).isoformat()}")
 
 def get_stream_details(source, sid):
     try:
-        url = f"{NODE_A_ENDPOINT}/stream/{source}/{sid}"
-        r = requests.get(url, headers=HEADERS, timeout=3)
-        if r.status_code == 200: return r.json()
+        return fetch_upstream(f"stream_{source}_{sid}", f"{NODE_A_ENDPOINT}/stream/{source}/{sid}", 3)
     except: pass
     return []
 
 def fetch_and_process():
     print(" > Fetching APIs...")
     try:
-        res_a = requests.get(f"{NODE_A_ENDPOINT}/matches/all", headers=HEADERS, timeout=10).json()
+        res_a = fetch_upstream('matches_all', f"{NODE_A_ENDPOINT}/matches/all", 10)
     except: res_a = []
     try:
-        res_b_json = requests.get(ADSTRIM_ENDPOINT, headers=HEADERS, timeout=10).json()
+        res_b_json = fetch_upstream('adstrim_events', ADSTRIM_ENDPOINT, 10)
         res_b = res_b_json.get('data', [])
     except: res_b = []
 
@@ -296,7 +387,7 @@ def fetch_and_process():
         
         # Get current time once before the loop
         # Get current time in MILLISECONDS to match the API data
-        current_time_ms = time.time() * 1000
+        current_time_ms = now_ts() * 1000
 
         for future in as_completed(stream_detail_jobs):
             match_obj, src_name = stream_detail_jobs[future]
@@ -319,6 +410,7 @@ def fetch_and_process():
 
     merged_raw = merge_matches(valid_streamed, res_b)
     final_list = []
+    end_times = []  # parallel to final_list, for the identity index
     
     for item in merged_raw:
         sm = item['sm']
@@ -355,7 +447,7 @@ def fetch_and_process():
                     # ENCODE URL TO BASE64
                     enc_url = base64.b64encode(raw_url.encode('utf-8')).decode('utf-8') if raw_url else ""
                     
-                    streams.append({'source': 'streamed', 'type': src_key, 'name': f"{src_key} {d.get('streamNo','')}", 'url': enc_url, 'hd': d.get('hd', False), 'lang': d.get('language', '')})
+                    streams.append(Stream('streamed', f"{src_key} {d.get('streamNo','')}", enc_url, d.get('hd', False), d.get('language', ''), type=src_key))
                     
         if am and am.get('channels'):
             for ch in am['channels']:
@@ -363,7 +455,7 @@ def fetch_and_process():
                 # ENCODE URL TO BASE64
                 enc_url = base64.b64encode(raw_url.encode('utf-8')).decode('utf-8')
                 
-                streams.append({'source': 'adstrim', 'name': ch.get('name'), 'url': enc_url, 'hd': False, 'lang': ''})
+                streams.append(Stream('adstrim', ch.get('name'), enc_url))
 
         img_meta = {
             'home_name': home, 'away_name': away, 'league_name': league,
@@ -376,7 +468,7 @@ def fetch_and_process():
             'am_league_img': am.get('league_image') or am.get('league_images') if am else None
         }
 
-        now_ms = time.time() * 1000
+        now_ms = now_ts() * 1000
         viewers = sm.get('_totalViewers', 0) if sm else 0
         duration = int(am.get('duration')) if am and am.get('duration') else SPORT_DURATIONS.get('default', 130)
         end_time = ts + (duration * 60 * 1000)
@@ -440,19 +532,60 @@ def fetch_and_process():
             base_sc = 5 * 10**18 if is_boosted else 0
             score = base_sc + (admin_score * 10**15) - ts
 
-        final_list.append({
-            'id': seo_id, 'home': home, 'away': away, 'title': title,
-            'league': league, 'sport': sport, 'timestamp': ts,
-            'is_live': is_live, 'status_text': status_text, 'viewers': viewers,
-            'streams': streams, 'score': score, 'is_single': (not away or away == "TBA"),
-            '_img_meta': img_meta
-        })
+        final_list.append(Match(
+            seo_id, home, away, title, league, sport, ts,
+            is_live, status_text, viewers, streams, score, (not away or away == "TBA"),
+            img_meta
+        ))
+        end_times.append(end_time)
 
+    # First-assigned ids survive kickoff shifts and respelled teams
+    kept, duplicates, drifted, new, evicted = assign_stable_ids(IDENTITY_INDEX, final_list, end_times, now_ts() * 1000)
+    print(f" > Match ids: {kept} kept, {duplicates} duplicate listings, {drifted} kept across drift, {new} new, {evicted} ended evicted")
     return final_list
 
 # ==============================================================================
 # 5. IMAGE CHECKER
 # ==============================================================================
+# Negative cache: every failed logo URL is remembered per (kind, name, url) and
+# retried with exponential backoff instead of on every cron run.
+FAIL_CACHE_PATH = 'assets/data/image_failures.json'
+FAIL_BACKOFF_BASE = 3600            # 1h wait after the first failure
+FAIL_BACKOFF_CAP = 7 * 86400        # never wait longer than a week
+FAIL_MISSING_AFTER = 4              # failures per URL before a name is "known missing"
+FAIL_FORGET_AFTER = 30 * 86400      # drop entries not touched for a month
+
+def load_fail_cache():
+    cache = load_json(FAIL_CACHE_PATH)
+    if 'urls' not in cache: cache['urls'] = {}
+    if 'missing' not in cache: cache['missing'] = {}
+    return cache
+
+def save_fail_cache(cache, now):
+    # Keep the file bounded: forget stale entries and expired "missing" marks
+    cache['urls'] = {k: v for k, v in cache['urls'].items() if now - v.get('last', 0) < FAIL_FORGET_AFTER}
+    cache['missing'] = {k: v for k, v in cache['missing'].items() if v > now}
+    with open(FAIL_CACHE_PATH, 'w', encoding='utf-8') as f: json.dump(cache, f, indent=2, sort_keys=True)
+
+def fail_key(kind, name, url):
+    return f"{kind}|{name}|{url}"
+
+def can_attempt(cache, key, now):
+    entry = cache['urls'].get(key)
+    return not entry or now >= entry.get('retry_at', 0)
+
+def record_failure(cache, key, now):
+    entry = cache['urls'].setdefault(key, {'fails': 0})
+    entry['fails'] += 1
+    delay = min(FAIL_BACKOFF_BASE * (2 ** (entry['fails'] - 1)), FAIL_BACKOFF_CAP)
+    entry['last'] = int(now)
+    entry['retry_at'] = int(now + delay)
+
+def record_success(cache, kind, name):
+    prefix = f"{kind}|{name}|"
+    for k in [k for k in cache['urls'] if k.startswith(prefix)]: del cache['urls'][k]
+    cache['missing'].pop(f"{kind}|{name}", None)
+
 def run_image_downloader(matches):
     print(" > Checking for new images...")
     img_map = load_json(IMAGE_MAP_PATH)
@@ -463,62 +596,101 @@ def run_image_downloader(matches):
     dirs = ['assets/logos/streamed', 'assets/logos/upstreams', 'assets/logos/leagues']
     for d in dirs: os.makedirs(d, exist_ok=True)
 
+    fail_cache = load_fail_cache()
+    now = now_ts()
+    stats = {'ok': 0, 'failed': 0, 'skipped': 0}
+
+    hash_index = load_index()
+    # Pages of this run may still be rendering from LOGO_VARIANTS: new logos go into a copy
+    variants = dict(LOGO_VARIANTS)
+
     def process_and_save(url, save_path):
+        # Returns the stored path (may be an existing identical logo) or None
         try:
             r = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
             if r.status_code == 200:
-                img = Image.open(BytesIO(r.content))
-                img = img.resize((60, 60), Image.Resampling.LANCZOS)
-                img.save(save_path, 'WEBP', quality=90)
-                return True
+                src = Image.open(BytesIO(r.content))
+                img = src.resize((60, 60), Image.Resampling.LANCZOS)
+                buf = BytesIO()
+                img.save(buf, 'WEBP', quality=90)
+                stored = store_logo(buf.getvalue(), save_path, hash_index)
+                store_variants(src, stored, save_path, variants)
+                return stored
         except: pass
-        return False
+        return None
+
+    def try_candidates(kind, name, candidates):
+        # candidates: [(url, save_path), ...] in priority order
+        if f"{kind}|{name}" in fail_cache['missing']:
+            stats['skipped'] += 1
+            return None
+        for url, save_path in candidates:
+            key = fail_key(kind, name, url)
+            if not can_attempt(fail_cache, key, now):
+                stats['skipped'] += 1
+                continue
+            stored = process_and_save(url, save_path)
+            if stored:
+                record_success(fail_cache, kind, name)
+                stats['ok'] += 1
+                return stored
+            record_failure(fail_cache, key, now)
+            stats['failed'] += 1
+        # Every source has failed repeatedly -> stop spending time on this name
+        if candidates and all(fail_cache['urls'].get(fail_key(kind, name, u), {}).get('fails', 0) >= FAIL_MISSING_AFTER for u, _ in candidates):
+            fail_cache['missing'][f"{kind}|{name}"] = int(now + FAIL_BACKOFF_CAP)
+        return None
 
     for m in matches:
-        meta = m.get('_img_meta', {})
-        for key, team in [('home', m['home']), ('away', m['away'])]:
-            if team and team != 'TBA' and team not in img_map['teams']:
-                success = False
+        meta = m.img_meta
+        for key, team in [('home', m.home), ('away', m.away)]:
+            if team and team != 'TBA' and lookup(team, img_map['teams']) is None:
+                candidates = []
                 if meta.get(f'sm_{key}_badge'):
                     url = f"https://streamed.pk/api/images/badge/{meta[f'sm_{key}_badge']}.webp"
-                    fname = f"assets/logos/streamed/{slugify(team)}.webp"
-                    if process_and_save(url, fname): img_map['teams'][team] = fname; success = True; updated = True
-                if not success:
-                    url = meta.get(f'am_{key}_img')
-                    if not url and meta.get(f'am_{key}_dict'):
-                        d = meta[f'am_{key}_dict']
-                        if isinstance(d, dict): url = d.get('sofascore') or d.get('flashscore')
-                    if url:
-                        fname = f"assets/logos/upstreams/{slugify(team)}.webp"
-                        if process_and_save(url, fname): img_map['teams'][team] = fname; updated = True
-
-        l_name = m['league']
+                    candidates.append((url, f"assets/logos/streamed/{slugify(team)}.webp"))
+                url = meta.get(f'am_{key}_img')
+                if not url and meta.get(f'am_{key}_dict'):
+                    d = meta[f'am_{key}_dict']
+                    if isinstance(d, dict): url = d.get('sofascore') or d.get('flashscore')
+                if url:
+                    candidates.append((url, f"assets/logos/upstreams/{slugify(team)}.webp"))
+                fname = try_candidates('teams', team, candidates)
+                if fname: img_map['teams'][team] = fname; updated = True
+
+        l_name = m.league
         if l_name and l_name not in img_map['leagues']:
             url = meta.get('am_league_img')
             if url:
-                fname = f"assets/logos/leagues/{slugify(l_name)}.webp"
-                if process_and_save(url, fname): img_map['leagues'][l_name] = fname; updated = True
+                fname = try_candidates('leagues', l_name, [(url, f"assets/logos/leagues/{slugify(l_name)}.webp")])
+                if fname: img_map['leagues'][l_name] = fname; updated = True
 
     if updated:
         with open(IMAGE_MAP_PATH, 'w', encoding='utf-8') as f: json.dump(img_map, f, indent=4)
+        save_index(hash_index)
+        save_variants(variants)
+    save_fail_cache(fail_cache, now)
+    print(f"   - Images: {stats['ok']} new, {stats['failed']} failed, {stats['skipped']} skipped (backoff/known missing)")
 
 # ==============================================================================
 # 6. HTML RENDERERS (With Dynamic Editing Logic)
 # ==============================================================================
-def get_display_time(unix_ms):
+def get_local_dt(unix_ms):
     utc_dt = datetime.fromtimestamp(unix_ms / 1000, tz=timezone.utc)
+    return utc_dt if TARGET_COUNTRY == 'UK' else utc_dt - timedelta(hours=5)
+
+def get_display_time(unix_ms):
+    local_dt = get_local_dt(unix_ms)
     if TARGET_COUNTRY == 'UK':
-        local_dt = utc_dt
         time_str = local_dt.strftime('%H:%M GMT')
         date_str = local_dt.strftime('%d %b')
     else:
-        local_dt = utc_dt - timedelta(hours=5)
         time_str = local_dt.strftime('%I:%M %p ET')
         date_str = local_dt.strftime('%b %d')
     return { "time": time_str, "date": date_str }
 
 def get_logo(name, type_key):
-    path = image_map[type_key].get(name)
+    path = lookup(name, image_map[type_key])
     if path: 
         if not path.startswith('http') and not path.startswith('/'): path = f"/{path}"
         return path
@@ -526,13 +698,106 @@ def get_logo(name, type_key):
     letter = name[0] if name else "?"
     return f"fallback:{c}:{letter}" 
 
-def render_match_row(m, section_title=""):
-    is_live = m['is_live']
+# --- LOGO SPRITE ATLAS ---
+# Each generated page gets one sheet holding every local team logo it shows.
+# Rows reference a cell via CSS class; logos missing from the sheet keep <img>.
+# Sheets are built from a snapshot of the logo files taken before the image
+# downloader starts (it rewrites and removes files), so hubs render alongside it.
+SPRITE_DIR = 'assets/sprites'
+SPRITE_CELL = 60
+
+def snapshot_logos(matches):
+    """Bytes of every local team logo the slate shows: logo path -> data."""
+    logos = {}
+    for m in matches:
+        for name in (m.home, m.away):
+            p = get_logo(name, 'teams')
+            if p in logos or not p.startswith('/') or not os.path.exists(p.lstrip('/')): continue
+            with open(p.lstrip('/'), 'rb') as f: logos[p] = f.read()
+    return logos
+
+def build_sprite_atlas(ctx, page_key, matches):
+    """Writes the page's sheet and fills ctx.sprite (logo path -> sprite class) for its rows."""
+    ctx.sprite = {}
+    paths = []
+    seen = set()
+    for m in matches:
+        for name in (m.home, m.away):
+            p = get_logo(name, 'teams')
+            if p in seen or not p.startswith('/'): continue
+            seen.add(p)
+            if p in ctx.logos: paths.append(p)
+    if not paths: return ""
+
+    cols = math.ceil(math.sqrt(len(paths)))
+    rows = math.ceil(len(paths) / cols)
+    sheet = Image.new('RGBA', (cols * SPRITE_CELL, rows * SPRITE_CELL), (0, 0, 0, 0))
+    placed = []
+    for p in paths:
+        try:
+            img = Image.open(BytesIO(ctx.logos[p])).convert('RGBA')
+            if img.size != (SPRITE_CELL, SPRITE_CELL): img = img.resize((SPRITE_CELL, SPRITE_CELL), Image.Resampling.LANCZOS)
+        except: continue
+        i = len(placed)
+        sheet.paste(img, ((i % cols) * SPRITE_CELL, (i // cols) * SPRITE_CELL))
+        placed.append(p)
+
+    buf = BytesIO()
+    sheet.save(buf, 'WEBP', quality=90, method=4)  # method=6 cost ~5s per large sheet for ~2% bytes
+    data = buf.getvalue()
+    fname = f"{SPRITE_DIR}/{page_key}.{hashlib.md5(data).hexdigest()[:10]}.webp"
+    os.makedirs(SPRITE_DIR, exist_ok=True)
+    for old in glob.glob(f"{SPRITE_DIR}/{page_key}.*.webp"):
+        if old != fname: os.remove(old)
+    if not os.path.exists(fname):
+        with open(fname, 'wb') as f: f.write(data)
+
+    # Percent offsets keep the sheet scalable to any .logo-box size
+    css = [f".t-sprite{{display:block;background-image:url(/{fname});background-size:{cols * 100}% {rows * 100}%;background-repeat:no-repeat}}"]
+    for i, p in enumerate(placed):
+        x = (i % cols) * 100 / (cols - 1) if cols > 1 else 0
+        y = (i // cols) * 100 / (rows - 1) if rows > 1 else 0
+        css.append(f".sp-{i}{{background-position:{x:g}% {y:g}%}}")
+        ctx.sprite[p] = f"sp-{i}"
+    return "".join(css)
+
+def inject_sprite_css(html, css):
+    block = f'<style id="logo-sprite">{css}</style>'
+    if '<style id="logo-sprite">' in html:
+        return re.sub(r'<style id="logo-sprite">.*?</style>', lambda _: block, html, flags=re.DOTALL)
+    return html.replace('</head>', f'{block}\n</head>', 1)
+
+def logo_srcset(path, fmt, scales):
+    return ", ".join(f"{variant_path(path, fmt, sc)} {sc}x" for sc in scales)
+
+def render_logo_img(path, alt, css_class, extra_attrs=''):
+    """<img> with a 1x/2x srcset, wrapped in <picture> when AVIF siblings exist."""
+    v = get_variants(LOGO_VARIANTS, path)
+    webp = v.get('webp', [1])
+    srcset = f' srcset="{logo_srcset(path, "webp", webp)}"' if len(webp) > 1 else ''
+    img = f'<img src="{path}"{srcset} alt="{alt}" class="{css_class}"{extra_attrs}>'
+    if not v.get('avif'): return img
+    return f'<picture><source type="image/avif" srcset="{logo_srcset(path, "avif", v["avif"])}">{img}</picture>'
+
+# Row icon: references the <symbol id="i-copy"> defined once in each hub template
+COPY_ICON = '<svg width="12" height="12" aria-hidden="true"><use href="#i-copy"/></svg>'
+
+def watch_page_url(match_id):
+    """Public URL of a match's prerendered info page."""
+    return f"https://{DOMAIN}/watch/{urllib.parse.quote(match_id)}/"
+
+WATCH_BUTTON_LEAD = 30  # minutes before kickoff a row's Notify button turns into Watch
+
+def shows_watch_button(m):
+    return m.is_live or (m.timestamp - now_ts() * 1000) / 60000 <= WATCH_BUTTON_LEAD
+
+def render_match_row(ctx, m, section_title=""):
+    is_live = m.is_live
     row_class = "match-row live" if is_live else "match-row"
     
     if is_live:
-        time_html = f'<span class="live-txt">{m["status_text"]}</span><span class="time-sub">{m["sport"].upper()}</span>'
-        v = m.get("viewers", 0)
+        time_html = f'<span class="live-txt">{m.status_text}</span><span class="time-sub">{m.sport.upper()}</span>'
+        v = m.viewers
         # CHANGED: Only show the eye icon if viewers are greater than 0
         if v > 0:
             v_str = f"{v/1000:.1f}k" if v >= 1000 else str(v)
@@ -540,49 +805,113 @@ def render_match_row(m, section_title=""):
         else:
             meta_html = '' # Show nothing if 0 viewers
     else:
-        ft = get_display_time(m['timestamp'])
+        ft = get_display_time(m.timestamp)
         time_html = f'<span class="time-main">{ft["time"]}</span><span class="time-sub">{ft["date"]}</span>'
-        meta_html = f'<div style="display:flex; flex-direction:column; align-items:flex-end;"><span style="font-size:0.55rem; color:var(--text-muted); font-weight:700; text-transform:uppercase;">Starts</span><span class="meta-top" style="color:var(--accent-gold);">{m["status_text"]}</span></div>'
+        meta_html = f'<div class="meta-stack"><span class="meta-label">Starts</span><span class="meta-top">{m.status_text}</span></div>'
 
     def render_team(name):
         res = get_logo(name, 'teams')
         if res.startswith('fallback'):
             _, c, l = res.split(':')
             img_html = f'<div class="logo-box"><span class="t-logo" style="background:{c}">{l}</span></div>'
+        elif res in ctx.sprite:
+            img_html = f'<div class="logo-box"><span class="t-img t-sprite {ctx.sprite[res]}" role="img" aria-label="{name}"></span></div>'
         else:
-            img_html = f'<div class="logo-box"><img src="{res}" alt="{name}" class="t-img" loading="lazy"></div>'
+            img_tag = render_logo_img(res, name, 't-img', ' loading="lazy"')
+            img_html = f'<div class="logo-box">{img_tag}</div>'
         return f'<div class="team-name">{img_html} {name}</div>'
 
-    teams_html = render_team(m["home"])
-    if not m['is_single']: teams_html += render_team(m["away"])
-    elif m['home'] == "TBA" and m['away'] == "TBA" and m['title']:
-        teams_html = f'<div class="team-name" style="justify-content:center; font-weight:600;">{m["title"]}</div>'
+    teams_html = render_team(m.home)
+    if not m.is_single: teams_html += render_team(m.away)
+    elif m.home == "TBA" and m.away == "TBA" and m.title:
+        teams_html = f'<div class="team-name event-title">{m.title}</div>'
 
-    info_url = f"https://{DOMAIN}/watch/?{PARAM_INFO}={m['id']}"
+    info_url = watch_page_url(m.id)
     
-    svg_icon = '<svg viewBox="0 0 24 24" width="12" height="12" fill="currentColor"><path d="M16 1H4c-1.1 0-2 .9-2 2v14h2V3h12V1zm3 4H8c-1.1 0-2 .9-2 2v14c0 1.1.9 2 2 2h11c1.1 0 2-.9 2-2V7c0-1.1-.9-2-2-2zm0 16H8V7h11v14z"/></svg>'
-    copy_btn = f'<button class="btn-copy-link" onclick="copyText(\'{info_url}\')">{svg_icon} Link</button>'
+    copy_btn = f'<button class="btn-copy-link" onclick="copyText(\'{info_url}\')">{COPY_ICON} Link</button>'
 
     btn = ""
-    diff = (m['timestamp'] - time.time()*1000) / 60000
     
     # Use Dynamic Text from THEME
     watch_text = THEME.get("text_watch_btn", "WATCH")
     hd_text = THEME.get("text_hd_badge", "HD")
     
-    if is_live or diff <= 30:
+    if shows_watch_button(m):
         btn = f'<a href="{info_url}" class="btn-watch">{watch_text} <span class="hd-badge">{hd_text}</span></a>'
     else:
         btn = '<button class="btn-notify" onclick="handleNotify(this)">🔔 Notify</button>'
 
-    tag = m['league'].upper()
-    if section_title and section_title.lower() in m['league'].lower():
-        tag = m['sport'].upper()
-
-    return f'<div class="{row_class}"><div class="col-time">{time_html}</div><div class="teams-wrapper"><div class="league-tag">{tag}</div>{teams_html}</div><div class="col-meta">{meta_html}</div><div class="col-action">{btn}{copy_btn}</div></div>'
-
-def render_container(matches, title, icon=None, link=None, is_live_section=False, section_id=None):
-    if not matches: return ""
+    tag = m.league.upper()
+    if section_title and section_title.lower() in m.league.lower():
+        tag = m.sport.upper()
+
+    return f'<div class="{row_class}" data-ts="{m.timestamp}"><div class="col-time">{time_html}</div><div class="teams-wrapper"><div class="league-tag">{tag}</div>{teams_html}</div><div class="col-meta">{meta_html}</div><div class="col-action">{btn}{copy_btn}</div></div>'
+
+# --- ON-DEMAND ROW CHUNKS ---
+# A section ships its first SECTION_PAGE_ROWS rows in the page. The rest are
+# prerendered into chunks/<page>/<section>-<day>-<n>.<hash>.html fragments (split
+# per display day, at most one page of rows each) that the Show More button fetches.
+# The content hash in the name keeps CDN / precompressed copies from serving rows
+# that no longer match the page; the previous run's chunks stay on disk one more
+# run for pages still cached with the old names (see clean_chunks).
+CHUNK_DIR = 'chunks'
+LIVE_PAGE_ROWS = 5  # live sections always opened with five rows
+
+def write_row_chunks(ctx, rows, title, page, uid, limit):
+    days = {}
+    for m in rows: days.setdefault(get_local_dt(m.timestamp).strftime('%Y%m%d'), []).append(m)
+    urls = []
+    for day in sorted(days):
+        day_rows = days[day]
+        for n in range(0, len(day_rows), limit):
+            html = "".join(render_match_row(ctx, m, title) for m in day_rows[n:n + limit])
+            tag = hashlib.md5(html.encode('utf-8')).hexdigest()[:10]
+            path = os.path.join(CHUNK_DIR, page, f"{uid}-{day}-{n // limit + 1}.{tag}.html")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_output(ctx, path, html)
+            ctx.chunks.add(os.path.normpath(path))
+            urls.append('/' + path.replace(os.sep, '/'))
+    return urls
+
+def paged_rows(ctx, matches, title, page, uid, limit=None, auto=False):
+    """First `limit` rows inline, then a Show More button over the chunks holding the rest (auto: also loads on scroll)."""
+    limit = limit or SECTION_PAGE_ROWS
+    for m in matches[:limit]: yield render_match_row(ctx, m, title)
+    rest = matches[limit:]
+    if not rest: return
+    chunks = " ".join(write_row_chunks(ctx, rest, title, page, uid, limit))
+    btn_text = THEME.get("text_show_more", "Show More")
+    auto_attr = ' data-auto="1"' if auto else ''
+    yield f'<button class="show-more-btn" data-label="{btn_text}" data-left="{len(rest)}" data-chunks="{chunks}"{auto_attr} onclick="loadMore(this)">{btn_text} ({len(rest)}) ▼</button>'
+
+def clean_chunks(*page_contexts):
+    """
+    Drops chunk files neither this run (the pages' contexts) nor the previous
+    one wrote (ended days, shrunk sections, old hashes).
+    """
+    ctx = RenderContext()
+    written = set().union(*(c.chunks for c in page_contexts))
+    ctx.state['chunks'] = sorted(written)
+    if not os.path.isdir(CHUNK_DIR): return ctx
+    keep = written.union(SLATE_STATE.get('chunks', []))
+    removed = 0
+    for dirpath, _, filenames in os.walk(CHUNK_DIR, topdown=False):
+        for f in filenames:
+            path = os.path.normpath(os.path.join(dirpath, f))
+            source = path[:-3] if path.endswith(('.gz', '.br')) else path  # precompressed siblings go too
+            if source not in keep:
+                os.remove(path)
+                removed += path == source
+        if not os.listdir(dirpath): os.rmdir(dirpath)
+    print(f" > Row chunks: {len(written)} written, {removed} stale removed.")
+    return ctx
+
+def render_container(ctx, matches, title, icon=None, link=None, is_live_section=False, section_id=None, page='home'):
+    return "".join(container_parts(ctx, matches, title, icon, link, is_live_section, section_id, page))
+
+def container_parts(ctx, matches, title, icon=None, link=None, is_live_section=False, section_id=None, page='home'):
+    """Section markup as a stream of fragments (header, one per row, closers) for the streaming writer."""
+    if not matches: return
     
     # --- DYNAMIC BORDER LOGIC ---
     border_style = ""
@@ -634,97 +963,339 @@ def render_container(matches, title, icon=None, link=None, is_live_section=False
     id_attr = f' id="{section_id}"' if section_id else ""
     header = f'<div class="sec-head" style="{border_style}"><h2 class="sec-title"{id_attr}>{img_html}{title}</h2>{right_content}</div>'
 
-    rows_html = ""
-    hidden_html = ""
-    
-    if is_live_section and len(matches) > 5:
-        visible = matches[:5]
-        hidden = matches[5:]
-        rows_html = "".join([render_match_row(m, title) for m in visible])
-        hidden_rows = "".join([render_match_row(m, title) for m in hidden])
-        
-        btn_id = f"btn-{int(time.time()*1000)}"
-        div_id = f"hide-{int(time.time()*1000)}"
-        btn_text = THEME.get("text_show_more", "Show More")
-        
-        hidden_html = f'''
-        <button id="{btn_id}" class="show-more-btn" onclick="toggleHidden('{div_id}', this)">{btn_text} ({len(hidden)}) ▼</button>
-        <div id="{div_id}" class="match-list" style="display:none; margin-top:10px;">{hidden_rows}</div>
-        '''
-    else:
-        rows_html = "".join([render_match_row(m, title) for m in matches])
-
-    return f'<div class="section-box">{header}<div class="match-list">{rows_html}</div>{hidden_html}</div>'
+    # Stable per-section ids (a timestamp id changed every run and collided within one ms)
+    uid = section_id or slugify(title) or 'section'
+    yield f'<div class="section-box">{header}<div class="match-list">'
+    yield from paged_rows(ctx, matches, title, page, uid, LIVE_PAGE_ROWS if is_live_section else None)
+    yield '</div></div>'
 
 # ==============================================================================
 # 7. INJECTORS (Marker Based Safe Injection)
 # ==============================================================================
+# Pages are re-read and re-injected every run, so every edit here must be
+# idempotent: attributes are replaced, never appended.
+ALLOW_GROWTH = '--allow-growth' in sys.argv
+OUTPUT_SIZES_BASELINE = load_json(OUTPUT_SIZES_PATH)   # previous accepted run
+
+class RenderContext:
+    """
+    Everything one render stage records while it writes, so stages that run
+    side by side share no mutable state. finish_stage merges them.
+    """
+    __slots__ = ('logos', 'sprite', 'chunks', 'sizes', 'growth', 'pages', 'state', 'minify', 'watch_ids')
+
+    def __init__(self, logos=None):
+        self.logos = logos or {}   # logo snapshot the sprite sheets are built from (read only)
+        self.sprite = {}           # logo path -> sprite class for the page being rendered
+        self.chunks = set()        # row chunks written or kept
+        self.sizes = {}            # path -> bytes on disk (next growth baseline)
+        self.growth = []           # (path, old, new) past the growth limit
+        self.pages = {}            # render records, see mark_rendered
+        self.state = {}            # other keys for the next slate state
+        self.minify = []           # write_minified stats
+        self.watch_ids = set()     # match ids whose watch/<id>/ page is on disk
+
+def set_style_attr(html, opening, style):
+    """
+    Sets the style attribute that follows `opening` (a literal tag prefix),
+    collapsing any copies earlier runs appended. style=None removes it.
+    """
+    attr = f' style="{style}"' if style else ''
+    return re.sub(f'({re.escape(opening)})(?:\\s+style="[^"]*")*', lambda m: m.group(1) + attr, html)
+
+def write_output(ctx, path, content):
+    """
+    write_minified + growth guard against the size of the previous run's output,
+    checked on the temp file: a page that trips it never replaces the old one.
+    content is a string or an iterable of fragments (streamed to disk, see page_parts).
+    """
+    key = os.path.normpath(path)
+    old_size = OUTPUT_SIZES_BASELINE.get(key, 0)
+
+    def accept(new_size):
+        if old_size and new_size > old_size * GROWTH_LIMIT and new_size - old_size > GROWTH_MIN_BYTES:
+            ctx.growth.append((key, old_size, new_size))
+            return ALLOW_GROWTH
+        return True
+
+    if isinstance(content, str): write_minified(path, content, accept, ctx.minify)
+    else: write_minified_parts(path, content, accept, ctx.minify)
+    if os.path.exists(path): ctx.sizes[key] = os.path.getsize(path)
+
+# --- Streaming page assembly ---
+# Large sections are never held as one string: the previous page is read back
+# as a shell with empty <!-- NAME_START --><!-- NAME_END --> markers and the
+# new page is written out piece by piece, each marker filled from a stream of fragments.
+SHELL_MARKER = re.compile(r'<!-- (\w+)_(START|END) -->')
+SHELL_READ_CHUNK = 64 * 1024
+HOME_SECTIONS = ('LIVE', 'WC', 'TOP5', 'GROUPED')
+LEAGUE_SECTIONS = ('L_LIVE', 'L_SCHED')
+
+def read_shell(path, names):
+    """The page at path with the named marker sections emptied, read in chunks (old rows are skipped, never loaded)."""
+    out = []
+    inside = None
+    buf = ''
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(SHELL_READ_CHUNK)
+            buf += chunk
+            pos = 0
+            for x in SHELL_MARKER.finditer(buf):
+                name, kind = x.groups()
+                if inside is None and kind == 'START' and name in names:
+                    out.append(buf[pos:x.end()])
+                    inside, pos = name, x.end()
+                elif kind == 'END' and name == inside:
+                    inside, pos = None, x.start()
+            # Hold back a tail that may end in a half-read marker
+            keep = max(pos, len(buf) - 64) if chunk else len(buf)
+            if inside is None: out.append(buf[pos:keep])
+            buf = buf[keep:]
+            if not chunk: break
+    if inside is not None:
+        print(f"   [!] {path}: {inside}_START without {inside}_END")
+        with open(path, 'r', encoding='utf-8') as f: return f.read()
+    return ''.join(out)
+
+def page_parts(shell, sections):
+    pos = 0
+    for x in re.finditer(r'<!-- (\w+)_START --><!-- \1_END -->', shell):
+        if x.group(1) not in sections: continue
+        yield shell[pos:x.start()]
+        yield f'<!-- {x.group(1)}_START -->'
+        yield from sections[x.group(1)]
+        yield f'<!-- {x.group(1)}_END -->'
+        pos = x.end()
+    yield shell[pos:]
+
+def peak_rss_mb():
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KB on Linux
+
+def check_growth(contexts):
+    growth = [g for ctx in contexts for g in ctx.growth]
+    if growth:
+        for path, old, new in growth:
+            print(f"   [!] {path} grew {old / 1024:.0f} KB -> {new / 1024:.0f} KB (limit {GROWTH_LIMIT}x){'' if ALLOW_GROWTH else ', previous file kept'}")
+        if not ALLOW_GROWTH:
+            sys.exit(f" ! Output growth guard tripped on {len(growth)} file(s); re-run with --allow-growth if expected")
+    # Only an accepted run becomes the next baseline
+    sizes = {}
+    for ctx in contexts: sizes.update(ctx.sizes)
+    with open(OUTPUT_SIZES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(sizes, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+# --- INCREMENTAL RENDERING ---
+# The slate is diffed against the previous run's (match_diff). A page is only
+# written again when one of its matches was added or changed, its match list
+# changed, its inputs changed (config, engine, watch shell), its file differs
+# from what the last run wrote, or its clock text (countdowns, live minutes)
+# is older than the refresh below. Status boundaries (going live, the watch
+# button threshold) are match changes, so they never wait for the refresh.
+# Kept pages stay byte-for-byte on disk, so precompress skips them too.
+PAGE_REFRESH = 15 * 60 * 1000    # home + league hubs (the row clocks are also redone client-side)
+WATCH_REFRESH = 60 * 60 * 1000   # watch pages (the clock text is also redone client-side)
+SLATE_STATE = load_state(SLATE_STATE_PATH)   # {'render_key', 'watch_shell', 'matches': {id: record}, 'pages': {path: {'ids', 'at'}}, 'chunks': [path]}
+NEXT_STATE = {'pages': {}}
+DIRTY = set()           # match ids added or changed this run
+FULL_RENDER = False
+
+def render_inputs_key():
+    """Everything besides the matches that goes into a page."""
+    with open(__file__, 'r', encoding='utf-8') as f: source = f.read()
+    return digest([config, WATCH_TEMPLATES, source])
+
+def plan_renders(matches):
+    """Diffs this slate against the last run's and marks what the renderers must redo."""
+    global FULL_RENDER
+    records = {}
+    for m in matches:
+        # watch_btn: crossing the Notify -> Watch threshold re-renders the rows (going live already does via is_live)
+        record = match_record(m, {'logos': [get_logo(m.home, 'teams'), get_logo(m.away, 'teams')], 'watch_btn': shows_watch_button(m)})
+        # The first listing of an id is the one its watch page shows; later ones only appear as hub rows
+        if m.id in records: records[m.id].setdefault('also', []).append(digest(record))
+        else: records[m.id] = record
+    diff = diff_slates(SLATE_STATE.get('matches', {}), records, int(now_ts()))
+    DIRTY.update(dirty_ids(diff))
+    key = render_inputs_key()
+    FULL_RENDER = key != SLATE_STATE.get('render_key') or '--full-render' in sys.argv
+    NEXT_STATE.update({'render_key': key, 'matches': records})
+    print(f" > Slate diff: {summarize(diff)}{' (full render)' if FULL_RENDER else ''}")
+    return diff
+
+def page_is_current(path, ids, refresh, force=False):
+    key = os.path.normpath(path)
+    prev = SLATE_STATE.get('pages', {}).get(key)
+    if force or FULL_RENDER or not prev or not os.path.exists(path): return False
+    # Rebuilt by build_site (or edited) since the last run
+    if os.path.getsize(path) != OUTPUT_SIZES_BASELINE.get(key): return False
+    if prev['ids'] != digest(sorted(ids)) or DIRTY.intersection(ids): return False
+    return now_ts() * 1000 - prev['at'] < refresh
+
+def keep_page(ctx, path, chunk_page=None):
+    """An unchanged page carries its size baseline, render record and row chunks into this run."""
+    key = os.path.normpath(path)
+    ctx.sizes[key] = OUTPUT_SIZES_BASELINE[key]
+    ctx.pages[key] = SLATE_STATE['pages'][key]
+    if chunk_page:
+        # The chunks it was rendered with, not whatever older generation is still on disk
+        prefix = os.path.join(CHUNK_DIR, chunk_page, '')
+        for f in SLATE_STATE.get('chunks', []):
+            if not f.startswith(prefix): continue
+            ctx.chunks.add(f)
+            if f in OUTPUT_SIZES_BASELINE: ctx.sizes[f] = OUTPUT_SIZES_BASELINE[f]
+
+def mark_rendered(ctx, path, ids):
+    ctx.pages[os.path.normpath(path)] = {'ids': digest(sorted(ids)), 'at': int(now_ts() * 1000)}
+
+def save_render_state(diff, contexts):
+    """After an accepted run only: a tripped growth guard re-renders from the older state."""
+    for ctx in contexts:
+        NEXT_STATE['pages'].update(ctx.pages)
+        NEXT_STATE.update(ctx.state)
+    save_state(SLATE_STATE_PATH, NEXT_STATE)
+    append_change_log(diff)
+
+# --- ITEMLIST SCHEMA (homepage + league hubs) ---
+# A match's SportsEvent is the same on every page that lists it, so it is
+# built and serialized once per run and spliced into each page's ItemList.
+INDIVIDUAL_SPORTS = ['tennis', 'boxing', 'mma', 'ufc', 'golf', 'darts', 'snooker', 'wrestling', 'table tennis', 'badminton']
+# Homepage and league stages run side by side: the cache is filled under SCHEMA_LOCK.
+SCHEMA_EVENTS = {}      # match id -> SportsEvent dict
+SCHEMA_EVENT_JSON = {}  # match id -> json.dumps(event)
+SCHEMA_STATS = {'reused': 0}
+SCHEMA_LOCK = threading.Lock()
+
+def schema_event(m):
+    if m.id in SCHEMA_EVENTS: return SCHEMA_EVENTS[m.id]
+    site_url = f"https://{DOMAIN}/"
+    event_name = m.title if m.is_single and m.title else f"{m.home} vs {m.away}"
+
+    # Person vs Person sports list competitors instead of home/away teams
+    raw_sport = (m.sport or "").lower()
+    is_individual = any(s in raw_sport for s in INDIVIDUAL_SPORTS)
+    entity_type = "Person" if is_individual else "SportsTeam"
+
+    event = {
+        "@type": "SportsEvent",
+        "name": event_name,
+        "description": f"Watch {event_name} live stream. {m.league}.",
+        "startDate": datetime.fromtimestamp(m.timestamp/1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        "eventStatus": "https://schema.org/EventLive" if m.is_live else "https://schema.org/EventScheduled",
+        "eventAttendanceMode": "https://schema.org/OnlineEventAttendanceMode",
+        "isAccessibleForFree": True,
+        "url": watch_page_url(m.id),
+        "image": [f"{site_url.rstrip('/')}{config['site_settings'].get('logo_url')}"],
+        "organizer": { "@id": f"{site_url}#organization" },
+        "sport": m.sport
+    }
 
-def build_homepage(matches):
+    if not m.is_single:
+        home_logo = lookup(m.home, image_map['teams'])
+        home_data = { "@type": entity_type, "name": m.home }
+        if home_logo: home_data["image"] = f"{site_url.rstrip('/')}/{home_logo}"
+
+        away_logo = lookup(m.away, image_map['teams'])
+        away_data = { "@type": entity_type, "name": m.away }
+        if away_logo: away_data["image"] = f"{site_url.rstrip('/')}/{away_logo}"
+
+        if is_individual:
+            event["competitor"] = [home_data, away_data]
+        else:
+            event["homeTeam"] = home_data
+            event["awayTeam"] = away_data
+
+    SCHEMA_EVENTS[m.id] = event
+    return event
+
+def schema_event_json(m):
+    with SCHEMA_LOCK:
+        if m.id in SCHEMA_EVENT_JSON:
+            SCHEMA_STATS['reused'] += 1
+            return SCHEMA_EVENT_JSON[m.id]
+        SCHEMA_EVENT_JSON[m.id] = json.dumps(schema_event(m))
+        return SCHEMA_EVENT_JSON[m.id]
+
+def build_list_schema(list_id, matches):
+    """ItemList JSON-LD assembled from the cached event fragments (same text as json.dumps of the whole list)."""
+    items = ", ".join(f'{{"@type": "ListItem", "position": {idx + 1}, "item": {schema_event_json(m)}}}' for idx, m in enumerate(matches))
+    return f'{{"@context": "https://schema.org", "@type": "ItemList", "@id": {json.dumps(list_id)}, "itemListElement": [{items}]}}'
+
+def build_homepage(ctx, matches):
     print(" > Injecting matches into Homepage...")
     
     if not os.path.exists('index.html'):
         print(" ! Error: index.html not found. Run build_site.py first.")
         return
         
-    with open('index.html', 'r', encoding='utf-8') as f:
-        html = f.read()
+    if page_is_current('index.html', [m.id for m in matches], PAGE_REFRESH):
+        keep_page(ctx, 'index.html', 'home')
+        print("   - Unchanged, kept.")
+        return False
+
+    # Shell only: the previous run's rows are dropped while reading
+    html = read_shell('index.html', HOME_SECTIONS)
 
-    live_matches = sorted([m for m in matches if m['is_live']], key=lambda x: x.get('score',0), reverse=True)
+    live_matches = sorted([m for m in matches if m.is_live], key=lambda x: x.score, reverse=True)
     
-    now_ms = time.time() * 1000
+    now_ms = now_ts() * 1000
     one_day = 24 * 60 * 60 * 1000
     
-    upcoming_full = [m for m in matches if not m['is_live']]
-    upcoming_full.sort(key=lambda x: x.get('score',0), reverse=True)
+    upcoming_full = [m for m in matches if not m.is_live]
+    upcoming_full.sort(key=lambda x: x.score, reverse=True)
     
-    used_ids = set(m['id'] for m in live_matches)
+    used_ids = set(m.id for m in live_matches)
+
+    # Sprite sheet for every match the homepage can show (live, wildcard, next 24h)
+    wc_cat = THEME.get('wildcard_category', '').lower()
+    page_matches = [m for m in matches if m.is_live or (m.timestamp - now_ms < one_day) or
+                    (len(wc_cat) > 2 and (wc_cat in m.league.lower() or wc_cat in m.sport.lower()))]
+    sprite_css = build_sprite_atlas(ctx, 'home', page_matches)
 
     # Use Theme Titles
     live_title = THEME.get('text_live_section_title', 'Trending Live')
-    live_html = render_container(live_matches, live_title, '<div class="live-dot-pulse"></div>', None, True)
+    sections = {'LIVE': container_parts(ctx, live_matches, live_title, '<div class="live-dot-pulse"></div>', None, True), 'WC': (), 'TOP5': ()}
 
-    wc_cat = THEME.get('wildcard_category', '').lower()
     wc_active = len(wc_cat) > 2
-    wc_html = ""
-    top5_html = ""
 
     if wc_active:
-        wc_m = [m for m in upcoming_full if wc_cat in m['league'].lower() or wc_cat in m['sport'].lower()]
-        for m in wc_m: used_ids.add(m['id'])
+        wc_m = [m for m in upcoming_full if wc_cat in m.league.lower() or wc_cat in m.sport.lower()]
+        for m in wc_m: used_ids.add(m.id)
         wc_title = THEME.get('text_wildcard_title', 'Featured')
         wc_id = THEME.get('id_wildcard', '') # Get ID from config
-        wc_html = render_container(wc_m, wc_title, '🔥', None, False, wc_id) # Pass ID
+        sections['WC'] = container_parts(ctx, wc_m, wc_title, '🔥', None, False, wc_id) # Pass ID
     else:
         top5 = []
         used_leagues = set()
         for m in upcoming_full:
             if len(top5) >= 5: break
-            if m['id'] in used_ids or (m['timestamp'] - now_ms >= one_day): continue
-            l_key = m['league'] or m['sport']
+            if m.id in used_ids or (m.timestamp - now_ms >= one_day): continue
+            l_key = m.league or m.sport
             if l_key in used_leagues: continue
             top5.append(m)
-            used_ids.add(m['id'])
+            used_ids.add(m.id)
             used_leagues.add(l_key)
         
         top5_title = THEME.get('text_top_upcoming_title', 'Top Upcoming')
         top5_id = THEME.get('id_top_upcoming', '') # Get ID from config
-        top5_html = render_container(top5, top5_title, '📅', None, False, top5_id) # Pass ID
+        sections['TOP5'] = container_parts(ctx, top5, top5_title, '📅', None, False, top5_id) # Pass ID
 
-    # Grouped Section
-    grouped_html = ""
+    # Grouped Section (one fragment stream per league, written in order)
+    grouped = []
     # 1. Get the prefix from Theme settings
     prefix = THEME.get('text_section_prefix', '').strip()
 
     for key, settings in PRIORITY_SETTINGS.items():
         if key.startswith('_') or settings.get('isHidden'): continue
         
-        grp = [m for m in upcoming_full if m['id'] not in used_ids and 
-               (key.lower() in m['league'].lower() or key.lower() in m['sport'].lower()) and 
-               (m['timestamp'] - now_ms < one_day)]
+        grp = [m for m in upcoming_full if m.id not in used_ids and 
+               (key.lower() in m.league.lower() or key.lower() in m.sport.lower()) and 
+               (m.timestamp - now_ms < one_day)]
         
         if grp:
-            for m in grp: used_ids.add(m['id'])
+            for m in grp: used_ids.add(m.id)
             logo = get_logo(key, 'leagues')
             icon = logo if not logo.startswith('fallback') else '🏆'
             link = f"/{slugify(key)}-streams/" if settings.get('hasLink') else None
@@ -743,149 +1314,272 @@ def build_homepage(matches):
             display_title = " ".join(parts)
             # --- END UPDATE ---
             
-            grouped_html += render_container(grp, display_title, icon, link)
+            grouped.append(container_parts(ctx, grp, display_title, icon, link))
             # RESTORED: Upcoming Other Section
     if not PRIORITY_SETTINGS.get('_HIDE_OTHERS'):
         # Filter: Not used yet AND starts within 24 hours
-        other_matches = [m for m in upcoming_full if m['id'] not in used_ids and (m['timestamp'] - now_ms < one_day)]
+        other_matches = [m for m in upcoming_full if m.id not in used_ids and (m.timestamp - now_ms < one_day)]
         
         if other_matches:
             # Removed limit ([:10]) and removed icon (None)
-            grouped_html += render_container(other_matches, "Upcoming Other", "🏆", None)
+            grouped.append(container_parts(ctx, other_matches, "Upcoming Other", "🏆", None))
+    sections['GROUPED'] = chain.from_iterable(grouped)
 
-    # Injection with Markers
-    if live_html:
-        html = re.sub(r'<!-- LIVE_START -->.*?<!-- LIVE_END -->', f'<!-- LIVE_START -->{live_html}<!-- LIVE_END -->', html, flags=re.DOTALL)
-        html = html.replace('id="live-content-wrapper" style="display:none;"', 'id="live-content-wrapper"')
-    else:
-        html = re.sub(r'<!-- LIVE_START -->.*?<!-- LIVE_END -->', '<!-- LIVE_START --><!-- LIVE_END -->', html, flags=re.DOTALL)
-        html = html.replace('id="live-content-wrapper"', 'id="live-content-wrapper" style="display:none;"')
-
-    html = re.sub(r'<!-- WC_START -->.*?<!-- WC_END -->', f'<!-- WC_START -->{wc_html}<!-- WC_END -->', html, flags=re.DOTALL)
-    html = re.sub(r'<!-- TOP5_START -->.*?<!-- TOP5_END -->', f'<!-- TOP5_START -->{top5_html}<!-- TOP5_END -->', html, flags=re.DOTALL)
-    html = re.sub(r'<!-- GROUPED_START -->.*?<!-- GROUPED_END -->', f'<!-- GROUPED_START -->{grouped_html}<!-- GROUPED_END -->', html, flags=re.DOTALL)
+    html = set_style_attr(html, 'id="live-content-wrapper"', None if live_matches else 'display:none;')
 
     html = re.sub(r'<div id="live-sk-head".*?</div>', '', html, flags=re.DOTALL)
     html = re.sub(r'<div id="live-skeleton".*?</div>', '', html, flags=re.DOTALL)
     html = re.sub(r'<div id="upcoming-skeleton".*?</div>', '', html, flags=re.DOTALL)
+    html = inject_sprite_css(html, sprite_css)
 
     # --- DYNAMIC SCHEMA GENERATION (Top 5 Live + Top 15 Upcoming) ---
-    schema_matches = live_matches[:5] + upcoming_full[:15]
-    list_items = []
-    
-    site_url = f"https://{DOMAIN}/"
-    org_id = f"{site_url}#organization"
-    
-    # Sports that are Person vs Person
-    INDIVIDUAL_SPORTS = ['tennis', 'boxing', 'mma', 'ufc', 'golf', 'darts', 'snooker', 'wrestling', 'table tennis', 'badminton']
-
-    for idx, m in enumerate(schema_matches):
-        match_url = f"{site_url}watch/?{PARAM_INFO}={m['id']}"
-        event_name = m['title'] if m['is_single'] and m['title'] else f"{m['home']} vs {m['away']}"
-        
-        # Determine Entity Type based on Sport
-        raw_sport = (m['sport'] or "").lower()
-        is_individual = any(s in raw_sport for s in INDIVIDUAL_SPORTS)
-        entity_type = "Person" if is_individual else "SportsTeam"
-
-        # Base Event Object
-        event = {
-            "@type": "SportsEvent",
-            "name": event_name,
-            "description": f"Watch {event_name} live stream. {m['league']}.",
-            "startDate": datetime.fromtimestamp(m['timestamp']/1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
-            "eventStatus": "https://schema.org/EventLive" if m['is_live'] else "https://schema.org/EventScheduled",
-            "eventAttendanceMode": "https://schema.org/OnlineEventAttendanceMode",
-            "isAccessibleForFree": True,  # <--- Added
-            "url": match_url,
-            "image": [f"{site_url.rstrip('/')}{config['site_settings'].get('logo_url')}"],
-            "organizer": { "@id": org_id },
-            "sport": m['sport']
-            # Removed "offers" block
-        }
-
-        # Handle Competitors (Team vs Team OR Person vs Person)
-        if not m['is_single']:
-            # Home
-            home_logo = image_map['teams'].get(m['home'])
-            home_data = { "@type": entity_type, "name": m['home'] }
-            if home_logo: home_data["image"] = f"{site_url.rstrip('/')}/{home_logo}"
-
-            # Away
-            away_logo = image_map['teams'].get(m['away'])
-            away_data = { "@type": entity_type, "name": m['away'] }
-            if away_logo: away_data["image"] = f"{site_url.rstrip('/')}/{away_logo}"
-
-            if is_individual:
-                # Individual sports use 'competitor' array
-                event["competitor"] = [home_data, away_data]
-            else:
-                # Team sports use 'homeTeam' and 'awayTeam'
-                event["homeTeam"] = home_data
-                event["awayTeam"] = away_data
-        
-        # Add to List Item
-        list_items.append({
-            "@type": "ListItem",
-            "position": idx + 1,
-            "item": event
-        })
-
-    # Construct the Final Dynamic JSON
-    dynamic_schema = {
-        "@context": "https://schema.org",
-        "@type": "ItemList",
-        "@id": f"{site_url}#matchlist",
-        "itemListElement": list_items
-    }
+    dynamic_schema = build_list_schema(f"https://{DOMAIN}/#matchlist", live_matches[:5] + upcoming_full[:15])
 
     # TARGETED INJECTION
     pattern = r'(<script id="dynamic-schema-placeholder" type="application/ld\+json">).*?(</script>)'
-    
-    html = re.sub(
-        pattern, 
-        lambda match: f"{match.group(1)}{json.dumps(dynamic_schema)}{match.group(2)}", 
-        html, 
-        flags=re.DOTALL
-    )
-
-    with open('index.html', 'w', encoding='utf-8') as f: f.write(html)
-
-def inject_watch_page(matches):
-    print(" > Injecting matches into Watch Page...")
-    target_file = 'watch/index.html'
-    if not os.path.exists(target_file):
-        print(f" ! Watch page not found at {target_file}")
-        return
+    html = re.sub(pattern, lambda match: f"{match.group(1)}{dynamic_schema}{match.group(2)}", html, flags=re.DOTALL)
+
+    # Rows are rendered lazily while the page streams to disk (sprite classes still needed)
+    write_output(ctx, 'index.html', page_parts(html, sections))
+    mark_rendered(ctx, 'index.html', [m.id for m in matches])
+    return True
+
+# --- Prerendered match pages (watch/<id>/index.html) ---
+# The watch page built by build_site is the shell: every match gets a copy with
+# the info view, article, meta tags and JSON-LD filled in, plus its own match
+# record so the client only has to hydrate the stream player.
+WATCH_SHELL = 'watch/index.html'
+WATCH_DATA_MARKER = '// {{INJECTED_MATCH_DATA}}'
+WATCH_DATA_PATTERN = r'//\s*\{\{INJECTED_MATCH_DATA\}\}|window\.MATCH_DATA\s*=\s*\[.*?\];(?:\s*window\.(?:LOGO_VARIANTS|PRERENDERED_ID)\s*=\s*(?:\{.*?\}|".*?");)*'
+PERSON_SPORTS = ['tennis', 'tabletennis', 'badminton', 'boxing', 'mma', 'ufc', 'fighting', 'snooker', 'darts', 'wrestling', 'golf']
+WATCH_SETTINGS = config.get('watch_settings', {})
+# Written by build_site with {{DOMAIN}}, {{THEME_*}}... filled in; raw settings until it has run
+WATCH_TEMPLATES_PATH = 'assets/data/watch_templates.json'
+WATCH_TEMPLATES = load_json(WATCH_TEMPLATES_PATH) or WATCH_SETTINGS
+LEFTOVER_PLACEHOLDER = re.compile(r'\{\{[A-Z][A-Z0-9_]*\}\}')
+WATCH_THEME = config.get('theme_watch') or THEME
+SITE_NAME = f"{SITE_SETTINGS.get('title_part_1', 'Stream')}{SITE_SETTINGS.get('title_part_2', 'East')}".strip()
+
+def apply_shortcodes(template, m, escape_values=False):
+    """Server-side port of the watch page shortcodes ({{HOME}}, {{VS}}, {{DATE}}...)."""
+    if not template: return ""
+    esc = escape if escape_values else (lambda v: v)
+    main_title = m.title or (m.home if m.is_single else f"{m.home} vs {m.away}")
+    ft = get_display_time(m.timestamp)
+    out = template
+    if m.is_single:
+        out = re.sub(r'\s*vs\s*\{\{AWAY\}\}', '', out, flags=re.IGNORECASE).replace('{{AWAY}}', '')
+    else:
+        out = out.replace('{{AWAY}}', esc(m.away or ''))
+    for code, value in (('{{VS}}', main_title), ('{{TITLE}}', main_title), ('{{HOME}}', m.home), ('{{LEAGUE}}', m.league),
+                        ('{{SPORT}}', m.sport), ('{{TIME}}', ft['time']), ('{{DATE}}', ft['date']), ('{{SITE_NAME}}', SITE_NAME)):
+        out = out.replace(code, esc(value or ''))
+    return out
 
-    with open(target_file, 'r', encoding='utf-8') as f:
-        html = f.read()
+def set_inner(html, el_id, content):
+    """Replaces the text content of a leaf element (no nested tag of the same name)."""
+    return re.sub(f'(<(\\w+)[^>]*\\bid="{el_id}"[^>]*>).*?(</\\2>)', lambda x: x.group(1) + content + x.group(3), html, count=1, flags=re.DOTALL)
 
-    # --- MODIFICATION: Create a clean copy without _img_meta ---
-    clean_matches = []
-    for m in matches:
-        # Shallow copy the match so we don't affect the original list used by image downloader
-        temp_m = m.copy()
-        # Remove the raw image metadata from this copy
-        temp_m.pop('_img_meta', None)
-        clean_matches.append(temp_m)
+def build_watch_schema(m, page_url, title, desc):
+    site_url = f"https://{DOMAIN}/"
+    logo_url = SITE_SETTINGS.get('logo_url') or SITE_SETTINGS.get('favicon_url', '/favicon.ico')
+    site_logo = logo_url if logo_url.startswith('http') else f"https://{DOMAIN}{'' if logo_url.startswith('/') else '/'}{logo_url}"
+    start = datetime.fromtimestamp(m.timestamp / 1000, timezone.utc)
+    event_name = m.title or (m.home if m.is_single else f"{m.home} vs {m.away}")
 
-    data_string = f"window.MATCH_DATA = {json.dumps(clean_matches)};"
-    # -----------------------------------------------------------
+    def team_logo(name):
+        res = get_logo(name, 'teams')
+        if res.startswith('fallback'): return None
+        return res if res.startswith('http') else f"https://{DOMAIN}{res}"
+
+    event = {
+        "@type": "SportsEvent",
+        "@id": f"{page_url}#sportsevent",
+        "name": event_name,
+        "startDate": start.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        "endDate": (start + timedelta(minutes=180)).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        "eventStatus": "https://schema.org/EventLive" if m.is_live else "https://schema.org/EventScheduled",
+        "eventAttendanceMode": "https://schema.org/OnlineEventAttendanceMode",
+        "sport": normalize_sport(m.sport),
+        "competition": { "@type": "SportsOrganization", "name": m.league },
+        "url": page_url,
+        "image": [site_logo],
+        "organizer": { "@id": f"{site_url}#organization" }
+    }
+    h_logo, a_logo = team_logo(m.home), team_logo(m.away)
+    if m.is_single:
+        # TBA performers (golf/F1 fields) are left out
+        if m.home and m.home != "TBA":
+            performer = { "@type": "Organization", "name": m.home }
+            if h_logo: performer["logo"] = h_logo
+            event["performer"] = [performer]
+    elif (m.sport or "").lower().replace(' ', '') in PERSON_SPORTS:
+        p1, p2 = { "@type": "Person", "name": m.home }, { "@type": "Person", "name": m.away }
+        if h_logo: p1["image"] = h_logo
+        if a_logo: p2["image"] = a_logo
+        event["competitor"] = [p1, p2]
+    else:
+        t1, t2 = { "@type": "SportsTeam", "name": m.home }, { "@type": "SportsTeam", "name": m.away }
+        if h_logo: t1["logo"] = h_logo
+        if a_logo: t2["logo"] = a_logo
+        event["homeTeam"], event["awayTeam"] = t1, t2
+
+    if m.is_live:
+        event["subjectOf"] = {
+            "@type": "VideoObject",
+            "@id": f"{page_url}#video",
+            "name": f"{event_name} Live Stream",
+            "description": f"Watch {event_name} live stream online coverage on {SITE_NAME}.",
+            "thumbnailUrl": site_logo,
+            "uploadDate": start.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            "isLiveBroadcast": True,
+            "contentUrl": page_url,
+            "embedUrl": page_url
+        }
 
-    pattern = r'(//\s*\{\{INJECTED_MATCH_DATA\}\}|window\.MATCH_DATA\s*=\s*\[.*?\];)'
-    
-    if re.search(pattern, html, flags=re.DOTALL):
-        # Unicode Safe Injection
-        html = re.sub(pattern, lambda _: data_string, html, flags=re.DOTALL)
-        with open(target_file, 'w', encoding='utf-8') as f:
-            f.write(html)
-        print("   - Watch data updated.")
+    graph = [
+        { "@type": "Organization", "@id": f"{site_url}#organization", "name": SITE_NAME, "url": site_url,
+          "logo": { "@type": "ImageObject", "url": site_logo, "width": 512, "height": 512 } },
+        { "@type": "WebSite", "@id": f"{site_url}#website", "url": site_url, "name": SITE_NAME,
+          "publisher": { "@id": f"{site_url}#organization" } },
+        { "@type": "WebPage", "@id": f"{page_url}#webpage", "url": page_url, "name": title, "description": desc,
+          "isPartOf": { "@id": f"{site_url}#website" }, "mainEntity": { "@id": f"{page_url}#sportsevent" } },
+        event
+    ]
+    return { "@context": "https://schema.org", "@graph": graph }
+
+def render_watch_page(shell, m):
+    single = m.is_single
+    page_url = watch_page_url(m.id)
+    title = apply_shortcodes(WATCH_TEMPLATES.get('meta_title_single', 'Watch {{VS}}') if single else WATCH_TEMPLATES.get('meta_title', 'Watch {{HOME}} vs {{AWAY}}'), m)
+    desc = apply_shortcodes(WATCH_TEMPLATES.get('meta_desc_single', '') if single else WATCH_TEMPLATES.get('meta_desc', ''), m)
+    ft = get_display_time(m.timestamp)
+    html = shell
+
+    # A. Head: title, description, canonical, JSON-LD
+    html = html.replace('<title></title>', f'<title>{escape(title)}</title>', 1)
+    html = re.sub(r'<meta name="description" content="[^"]*">', lambda _: f'<meta name="description" content="{escape(desc)}">', html, count=1)
+    html = re.sub(r'<link rel="canonical" href="[^"]*">', lambda _: f'<link rel="canonical" href="{page_url}">', html, count=1)
+    schema = json.dumps(build_watch_schema(m, page_url, title, desc), ensure_ascii=False)
+    html = html.replace('</head>', f'<script type="application/ld+json" id="dynamic-schema">{schema}</script>\n</head>', 1)
+
+    # B. Match header
+    def team_col(name):
+        res = get_logo(name, 'teams')
+        if res.startswith('fallback'): return f'<div class="mh-team-name-lg">{escape(name)}</div>'
+        img = render_logo_img(res, escape(name), 'mh-team-logo', ' width="28" height="28" loading="eager" onload="this.classList.add(\'loaded\')"')
+        return f'<div class="mh-team-name-sm">{escape(name)}</div><div class="logo-wrapper">{img}</div>'
+
+    if single:
+        html = html.replace('class="mh-fixed-container" id="mhFixed"', 'class="mh-fixed-container single-mode" id="mhFixed"', 1)
+        home_html = away_html = ''
+        headline = escape(m.title or m.home)
+        html = html.replace('id="centerHeadline"', 'id="centerHeadline" style="font-size:1.5rem;"', 1)
+        res = get_logo(m.home, 'teams')
+        if not res.startswith('fallback'):
+            html = set_style_attr(html, 'id="singleLogoContainer"', 'display:block;')
+            html = set_inner(html, 'singleLogoContainer', f'<div class="single-logo-wrapper">{render_logo_img(res, escape(m.home), "single-logo-img")}</div>')
+    else:
+        home_html, away_html, headline = team_col(m.home), team_col(m.away), "VS"
+    for col, content in (('mhHomeCol', home_html), ('mhAwayCol', away_html)):
+        html = re.sub(f'(id="{col}">)\\s*<div class="sk-box mh-sk-full sk-anim"></div>', lambda x: x.group(1) + content, html, count=1)
+    html = set_inner(html, 'centerHeadline', headline)
+    html = set_inner(html, 'mhLeague', escape(m.league or ''))
+    if m.is_live:
+        html = html.replace('class="mh-timer" id="mhTimer"', 'class="mh-timer live" id="mhTimer"', 1)
+        html = set_inner(html, 'mhTimer', escape(m.status_text or "LIVE"))
     else:
+        html = set_inner(html, 'mhTimer', escape(f"Starts in {m.status_text}" if m.status_text else ft['date']))
+
+    # C. Info table (skeleton removed, real table shown)
+    html = re.sub(r'<div id="sk-info-table-body"[^>]*></div>', '', html, count=1)
+    html = html.replace('class="info-table hidden-load"', 'class="info-table"', 1)
+    if m.is_live: label, countdown, color = "Playing", m.status_text or "Live", "#ef4444"
+    else: label, countdown, color = "Starts In", m.status_text or "Upcoming", "var(--accent-gold)"
+    html = re.sub(r'<td>Starts In</td>(<td id="tbl-countdown")[^>]*>.*?</td>',
+                  lambda x: f'<td>{label}</td>{x.group(1)} style="color:{color}; font-weight:700;">{escape(countdown)}</td>', html, count=1, flags=re.DOTALL)
+    cells = {'tbl-league': m.league, 'tbl-sport': normalize_sport(m.sport), 'tbl-date': ft['date'], 'tbl-time': ft['time']}
+    if single: cells['tbl-event'] = m.title or m.home
+    else: cells.update({'tbl-home': m.home, 'tbl-away': m.away})
+    for el_id, value in cells.items(): html = set_inner(html, el_id, escape(value or '--'))
+    html = set_style_attr(html, 'id="tr-home"', 'display:none;' if single else None)
+    html = set_style_attr(html, 'id="tr-away"', 'display:none;' if single else None)
+    html = set_style_attr(html, 'id="tr-single"', None if single else 'display:none;')
+
+    # D. Watch button as of this run (the client re-checks the start time)
+    if m.is_live or (m.timestamp - now_ts() * 1000) / 60000 <= 30:
+        btn = f'<button id="startWatchBtn" class="big-watch-btn">📺 {WATCH_THEME.get("watch_btn_label") or "Watch Live Stream"}</button>'
+    else:
+        btn = f'<button id="startWatchBtn" class="big-watch-btn disabled">🔒 {WATCH_THEME.get("watch_btn_disabled_label") or "Stream Starts Soon"}</button>'
+    html = re.sub(r'<button id="startWatchBtn"[^>]*>.*?</button>', lambda _: btn, html, count=1, flags=re.DOTALL)
+
+    # E. Article ({{WATCH_ARTICLE}} config with shortcodes applied)
+    article = apply_shortcodes(WATCH_TEMPLATES.get('article_single' if single else 'article', ''), m, escape_values=True)
+    article_html = f'<div id="seo-article-container" class="seo-article">{article}</div>\n' if article.strip() else ''
+    html = re.sub(r'<div id="sk-article"[^>]*></div>', '', html, count=1)
+    html = re.sub(r'<div id="seo-article-container".*?(?=<div id="footer-leagues-section")', lambda _: article_html, html, count=1, flags=re.DOTALL)
+
+    # F. This match only, for the stream player
+    data = f"window.MATCH_DATA = {json.dumps([m.to_public()])}; window.PRERENDERED_ID = {json.dumps(m.id)};"
+    return html.replace(WATCH_DATA_MARKER, data, 1)
+
+def prerender_watch_pages(ctx, matches):
+    print(" > Prerendering Watch Pages...")
+    if not os.path.exists(WATCH_SHELL):
+        print(f" ! Watch page not found at {WATCH_SHELL}")
+        return
+
+    with open(WATCH_SHELL, 'r', encoding='utf-8') as f:
+        shell = f.read()
+    if not re.search(WATCH_DATA_PATTERN, shell, flags=re.DOTALL):
         print("   ! Injection marker not found in watch page.")
+        return
+
+    # The bare /watch/ page keeps no slate: it only forwards legacy ?info= / ?stream= links
+    shell = re.sub(WATCH_DATA_PATTERN, lambda _: WATCH_DATA_MARKER, shell, count=1, flags=re.DOTALL)
+    write_output(ctx, WATCH_SHELL, shell)
+    # A new watch template re-renders every match page
+    ctx.state['watch_shell'] = digest(minify_html(shell))
+    new_shell = ctx.state['watch_shell'] != SLATE_STATE.get('watch_shell')
+
+    watch_dir = os.path.dirname(WATCH_SHELL)
+    written = ctx.watch_ids
+    unfilled = set()
+    kept = 0
+    for m in matches:
+        if not m.id or m.id in written or '/' in m.id or m.id.startswith('.'): continue
+        page_dir = os.path.join(watch_dir, m.id)
+        path = os.path.join(page_dir, 'index.html')
+        if page_is_current(path, [m.id], WATCH_REFRESH, force=new_shell):
+            keep_page(ctx, path)
+            kept += 1
+        else:
+            os.makedirs(page_dir, exist_ok=True)
+            page = render_watch_page(shell, m)
+            leftover = LEFTOVER_PLACEHOLDER.findall(page)
+            if leftover: unfilled.update(leftover)
+            write_output(ctx, path, page)
+            mark_rendered(ctx, path, [m.id])
+        written.add(m.id)
+
+    # A page goes when its id is evicted from the identity index (EVICT_AFTER past
+    # the end), not when the match is missing from one slate: a partial or empty
+    # fetch during an upstream outage must not wipe the prerendered pages
+    alive = known_ids(IDENTITY_INDEX)
+    removed = held = 0
+    for d in os.listdir(watch_dir):
+        if d in written or not os.path.exists(os.path.join(watch_dir, d, 'index.html')): continue
+        if d in alive:
+            held += 1
+            continue
+        shutil.rmtree(os.path.join(watch_dir, d))
+        removed += 1
+    print(f"   - {len(written) - kept} match pages written, {kept} unchanged kept, {held} off the slate held, {removed} ended pages removed.")
+    if unfilled: print(f"   [!] Unfilled placeholders in match pages: {', '.join(sorted(unfilled))}")
 
-def inject_leagues(matches):
+def inject_leagues(ctx, matches):
     print(" > Injecting matches into League Pages...")
+    kept = 0
 
     for key, settings in PRIORITY_SETTINGS.items():
         if key.startswith('_'): continue
@@ -896,13 +1590,19 @@ def inject_leagues(matches):
         if not os.path.exists(target_file): 
             continue
 
-        l_matches = [m for m in matches if key.lower() in m['league'].lower() or key.lower() in m['sport'].lower()]
-        l_live = sorted([m for m in l_matches if m['is_live']], key=lambda x: x.get('score',0), reverse=True)
-        l_upc = [m for m in l_matches if not m['is_live']]
-        l_upc.sort(key=lambda x: x['timestamp'])
+        l_matches = [m for m in matches if key.lower() in m.league.lower() or key.lower() in m.sport.lower()]
+        l_live = sorted([m for m in l_matches if m.is_live], key=lambda x: x.score, reverse=True)
+        l_upc = [m for m in l_matches if not m.is_live]
+        l_upc.sort(key=lambda x: x.timestamp)
+
+        if page_is_current(target_file, [m.id for m in l_matches], PAGE_REFRESH):
+            keep_page(ctx, target_file, slug)
+            kept += 1
+            continue
+
+        html = read_shell(target_file, LEAGUE_SECTIONS)
 
-        with open(target_file, 'r', encoding='utf-8') as f:
-            html = f.read()
+        sprite_css = build_sprite_atlas(ctx, slug, l_matches)
 
         # A. Inject League Logo
         logo_url = get_logo(key, 'leagues')
@@ -913,8 +1613,7 @@ def inject_leagues(matches):
         # B. Inject Section Border
         w = ensure_unit(THEME.get('sec_border_league_upcoming_width', '1'))
         c = THEME.get('sec_border_league_upcoming_color', '#334155')
-        border_style = f'style="border-bottom: {w} solid {c};"'
-        html = re.sub(r'(<div id="upcoming-container">\s*<div class="sec-head")', f'\\1 {border_style}', html)
+        html = re.sub(r'(<div id="upcoming-container">\s*<div class="sec-head")(?:\s+style="[^"]*")*', lambda m: f'{m.group(1)} style="border-bottom: {w} solid {c};"', html)
 
         # C. Inject Match Lists (HTML)
         if l_live:
@@ -923,82 +1622,28 @@ def inject_leagues(matches):
             live_title = live_tpl.replace('{{NAME}}', key)
             # --- END UPDATE ---
 
-            live_content = render_container(l_live, live_title, '<div class="live-dot-pulse"></div>', None, True)
-            html = re.sub(r'<!-- L_LIVE_START -->.*?<!-- L_LIVE_END -->', f'<!-- L_LIVE_START -->{live_content}<!-- L_LIVE_END -->', html, flags=re.DOTALL)
-            html = html.replace('id="live-list" style="display:none;"', 'id="live-list"')
+            sections = {'L_LIVE': container_parts(ctx, l_live, live_title, '<div class="live-dot-pulse"></div>', None, True, page=slug)}
         else:
-            # ... (keep the else block exactly as is)
-            html = re.sub(r'<!-- L_LIVE_START -->.*?<!-- L_LIVE_END -->', '<!-- L_LIVE_START --><!-- L_LIVE_END -->', html, flags=re.DOTALL)
-            html = html.replace('id="live-list"', 'id="live-list" style="display:none;"')
+            sections = {'L_LIVE': ()}
+        html = set_style_attr(html, 'id="live-list"', None if l_live else 'display:none;')
 
-        rows_html = "".join([render_match_row(m, key) for m in l_upc]) if l_upc else '<div class="match-row" style="justify-content:center;">No upcoming matches found.</div>'
-        html = re.sub(r'<!-- L_SCHED_START -->.*?<!-- L_SCHED_END -->', f'<!-- L_SCHED_START -->{rows_html}<!-- L_SCHED_END -->', html, flags=re.DOTALL)
+        sections['L_SCHED'] = paged_rows(ctx, l_upc, key, slug, 'schedule', auto=True) if l_upc else ['<div class="match-row" style="justify-content:center;">No upcoming matches found.</div>']
+        html = inject_sprite_css(html, sprite_css)
 
-        # D. INJECT DYNAMIC SCHEMA (NEW)
-        # Limit: 5 Live + 15 Upcoming (Sorted by time)
-        schema_matches = l_live[:5] + l_upc[:15]
-        list_items = []
-        
-        site_url = f"https://{DOMAIN}/"
-        page_url = f"{site_url}{slug}/"
-        org_id = f"{site_url}#organization"
-        INDIVIDUAL_SPORTS = ['tennis', 'boxing', 'mma', 'ufc', 'golf', 'darts', 'snooker', 'wrestling', 'table tennis', 'badminton']
-
-        for idx, m in enumerate(schema_matches):
-            match_url = f"{site_url}watch/?{PARAM_INFO}={m['id']}"
-            event_name = m['title'] if m['is_single'] and m['title'] else f"{m['home']} vs {m['away']}"
-            
-            raw_sport = (m['sport'] or "").lower()
-            is_individual = any(s in raw_sport for s in INDIVIDUAL_SPORTS)
-            entity_type = "Person" if is_individual else "SportsTeam"
-
-            event = {
-                "@type": "SportsEvent",
-                "name": event_name,
-                "description": f"Watch {event_name} live stream. {m['league']}.",
-                "startDate": datetime.fromtimestamp(m['timestamp']/1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
-                "eventStatus": "https://schema.org/EventLive" if m['is_live'] else "https://schema.org/EventScheduled",
-                "eventAttendanceMode": "https://schema.org/OnlineEventAttendanceMode",
-                "isAccessibleForFree": True,  # <--- Added
-                "url": match_url,
-                "image": [f"{site_url.rstrip('/')}{config['site_settings'].get('logo_url')}"],
-                "organizer": { "@id": org_id },
-                "sport": m['sport']
-                # Removed "offers" block
-            }
-
-            if not m['is_single']:
-                home_logo = image_map['teams'].get(m['home'])
-                home_data = { "@type": entity_type, "name": m['home'] }
-                if home_logo: home_data["image"] = f"{site_url.rstrip('/')}/{home_logo}"
-
-                away_logo = image_map['teams'].get(m['away'])
-                away_data = { "@type": entity_type, "name": m['away'] }
-                if away_logo: away_data["image"] = f"{site_url.rstrip('/')}/{away_logo}"
-
-                if is_individual:
-                    event["competitor"] = [home_data, away_data]
-                else:
-                    event["homeTeam"] = home_data
-                    event["awayTeam"] = away_data
-            
-            list_items.append({ "@type": "ListItem", "position": idx + 1, "item": event })
-
-        dynamic_schema = {
-            "@context": "https://schema.org",
-            "@type": "ItemList",
-            "@id": f"{page_url}#matchlist",
-            "itemListElement": list_items
-        }
+        # D. INJECT DYNAMIC SCHEMA (5 Live + 15 Upcoming, events shared with the homepage)
+        dynamic_schema = build_list_schema(f"https://{DOMAIN}/{slug}/#matchlist", l_live[:5] + l_upc[:15])
 
         # Inject into placeholder
         pattern = r'(<script id="dynamic-schema-placeholder" type="application/ld\+json">).*?(</script>)'
-        html = re.sub(pattern, lambda match: f"{match.group(1)}{json.dumps(dynamic_schema)}{match.group(2)}", html, flags=re.DOTALL)
+        html = re.sub(pattern, lambda match: f"{match.group(1)}{dynamic_schema}{match.group(2)}", html, flags=re.DOTALL)
 
-        with open(target_file, 'w', encoding='utf-8') as f: f.write(html)
+        write_output(ctx, target_file, page_parts(html, sections))
+        mark_rendered(ctx, target_file, [m.id for m in l_matches])
         print(f"   - Updated {slug}")
+    print(f"   - {kept} unchanged league pages kept")
 
-def generate_sitemap(matches):
+def generate_sitemap(ctx, matches, watch_ids):
+    """watch_ids: the match pages prerender_watch_pages wrote (or kept) this run; no other match URL is listed."""
     s_sett = config.get('site_settings', {})
     if not s_sett.get('sitemap_enabled', False):
         return
@@ -1012,31 +1657,31 @@ def generate_sitemap(matches):
     manual_date = s_sett.get('sitemap_lastmod_manual', '')
     if not manual_date: 
         # Fallback to today if admin never set it
-        manual_date = datetime.now().strftime('%Y-%m-%d')
+        manual_date = datetime.fromtimestamp(now_ts()).strftime('%Y-%m-%d')
     
     # 2. Current Date (Matches) - Server Local Time
-    today_date = datetime.now().strftime('%Y-%m-%d')
+    today_date = datetime.fromtimestamp(now_ts()).strftime('%Y-%m-%d')
 
     # --- STRATEGY: COLLECTION ---
     visible_ids = set()
-    now_ms = time.time() * 1000
+    now_ms = now_ts() * 1000
     one_day = 24 * 60 * 60 * 1000
     
     # 1. Homepage Matches
     wc_cat = THEME.get('wildcard_category', '').lower()
     for m in matches:
-        if len(wc_cat) > 2 and (wc_cat in m['league'].lower() or wc_cat in m['sport'].lower()):
-            visible_ids.add(m['id'])
-        elif (m['timestamp'] - now_ms) < one_day:
-            visible_ids.add(m['id'])
+        if len(wc_cat) > 2 and (wc_cat in m.league.lower() or wc_cat in m.sport.lower()):
+            visible_ids.add(m.id)
+        elif (m.timestamp - now_ms) < one_day:
+            visible_ids.add(m.id)
 
     # 2. League Page Matches
     if s_sett.get('sitemap_include_leagues', False):
         for key, settings in PRIORITY_SETTINGS.items():
             if key.startswith('_') or not settings.get('hasLink'): continue
             for m in matches:
-                if key.lower() in m['league'].lower() or key.lower() in m['sport'].lower():
-                    visible_ids.add(m['id'])
+                if key.lower() in m.league.lower() or key.lower() in m.sport.lower():
+                    visible_ids.add(m.id)
 
     # --- STRATEGY: XML BUILDING ---
     urls = []
@@ -1050,12 +1695,7 @@ def generate_sitemap(matches):
         # XML escape the final URL
         loc = loc.replace("&", "&amp;").replace("'", "&apos;").replace('"', "&quot;").replace("<", "&lt;").replace(">", "&gt;")
         
-        urls.append(f"""    <url>
-        <loc>{loc}</loc>
-        <lastmod>{date_val}</lastmod>
-        <changefreq>{freq}</changefreq>
-        <priority>{prio}</priority>
-    </url>""")
+        urls.append(f"<url><loc>{loc}</loc><lastmod>{date_val}</lastmod><changefreq>{freq}</changefreq><priority>{prio}</priority></url>")
 
     # A. Homepage (Manual Date)
     add_url("", "1.0", "always", manual_date)
@@ -1077,21 +1717,8 @@ def generate_sitemap(matches):
     add_url("watch", "0.7", "always", manual_date)
 
     # E. Match Info Pages (Today's Date)
-    param_info = s_sett.get('param_info', 'info')
-    for mid in visible_ids:
-        # URL-encode the match ID to fix non-ASCII characters
-        safe_mid = urllib.parse.quote(mid)
-        full_url = f"{base_url}/watch/?{param_info}={safe_mid}"
-        
-        # XML escape the URL (converts any rogue & into &amp;)
-        safe_full_url = full_url.replace("&", "&amp;").replace("'", "&apos;").replace('"', "&quot;").replace("<", "&lt;").replace(">", "&gt;")
-        
-        urls.append(f"""    <url>
-        <loc>{safe_full_url}</loc>
-        <lastmod>{today_date}</lastmod>
-        <changefreq>hourly</changefreq>
-        <priority>0.6</priority>
-    </url>""")
+    for mid in sorted(visible_ids & watch_ids):
+        add_url(f"watch/{mid}", "0.6", "hourly", today_date)
 
     # Write File
     xml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -1099,28 +1726,99 @@ def generate_sitemap(matches):
 {chr(10).join(urls)}
 </urlset>"""
     
-    with open('sitemap.xml', 'w', encoding='utf-8') as f:
-        f.write(xml_content)
+    write_output(ctx, 'sitemap.xml', xml_content)
     print(f"   - Generated sitemap.xml ({len(urls)} URLs)")
 # ==============================================================================
 # 8. MAIN EXECUTION
 # ==============================================================================
-def main():
-    print("--- 🚀 Master Engine Running (Strict Port) ---")
+def arg_value(flag):
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return None
+
+def fetch_stage(_):
     matches = fetch_and_process()
     print(f" > Total Valid Matches: {len(matches)}")
-    
-    build_homepage(matches)
-    print(" > Homepage Built.")
-    
-    inject_watch_page(matches)
-    print(" > Watch Data Injected.")
-    
-    inject_leagues(matches)
+    save_aliases(now_ts())
+    save_identity(IDENTITY_INDEX)
+    return matches
+
+def logos_stage(r):
+    logos = snapshot_logos(r['fetch'])
+    print(f" > Logo snapshot: {len(logos)} files for the sprite sheets")
+    return logos
+
+def images_stage(r):
+    # Logo downloads are network side effects, not part of a replayed run.
+    # Pages render from the image map loaded at startup, so new logos show up next run either way.
+    if REPLAY_DIR: print(" > Replay: skipping image downloader")
+    else: run_image_downloader(r['fetch'])
+
+def homepage_stage(r):
+    ctx = RenderContext(r['logos'])
+    if build_homepage(ctx, r['fetch']): print(" > Homepage Built.")
+    return ctx
+
+def leagues_stage(r):
+    ctx = RenderContext(r['logos'])
+    inject_leagues(ctx, r['fetch'])
     print(" > League Pages Updated.")
-    
-    run_image_downloader(matches)
-    generate_sitemap(matches)
+    return ctx
+
+def watch_stage(r):
+    ctx = RenderContext()
+    prerender_watch_pages(ctx, r['fetch'])
+    print(" > Watch Pages Prerendered.")
+    return ctx
+
+def sitemap_stage(r):
+    ctx = RenderContext()
+    generate_sitemap(ctx, r['fetch'], r['watch'].watch_ids)  # lists only pages that exist
+    return ctx
+
+RENDER_STAGES = ('homepage', 'leagues', 'watch', 'sitemap', 'chunks')  # stages returning a RenderContext
+
+def finish_stage(r):
+    contexts = [r[name] for name in RENDER_STAGES]
+    for ctx in contexts: MINIFY_STATS.extend(ctx.minify)
+    print_minify_report()
+    print(f" > Schema events: {len(SCHEMA_EVENT_JSON)} built, {SCHEMA_STATS['reused']} reused")
+    check_growth(contexts)
+    save_render_state(r['plan'], contexts)
+    precompress_outputs(OUTPUT_DIR)
+
+# Stage graph: (name, dependencies, fn). Render stages never share mutable
+# state: each records its sprite map, chunks, sizes, growth errors, render
+# records and minify stats in its own RenderContext (merged by finish), and the
+# schema event cache they do share is locked. So:
+#  - homepage, league pages and watch pages all render side by side
+#  - the sprite sheets are built from a snapshot of the logo files (logos), so
+#    only that snapshot waits on the fetch, not the downloads: images starts
+#    right after it and overlaps every render stage
+#  - the sitemap and search index list the watch pages that exist
+STAGES = [
+    ('fetch', (), fetch_stage),
+    ('plan', ('fetch',), lambda r: plan_renders(r['fetch'])),
+    ('logos', ('fetch',), logos_stage),
+    ('images', ('logos',), images_stage),
+    ('homepage', ('plan', 'logos'), homepage_stage),
+    ('leagues', ('plan', 'logos'), leagues_stage),
+    ('watch', ('plan',), watch_stage),
+    ('sitemap', ('watch',), sitemap_stage),
+    ('chunks', ('homepage', 'leagues'), lambda r: clean_chunks(r['homepage'], r['leagues'])),
+    ('search', ('watch',), lambda r: write_search_index([m for m in r['fetch'] if m.id in r['watch'].watch_ids])),  # results link to watch pages
+    ('finish', ('images', 'sitemap', 'chunks', 'search'), finish_stage),
+]
+
+def main():
+    print("--- 🚀 Master Engine Running (Strict Port) ---")
+    # Usage: --record DIR | --replay DIR [--now EPOCH_SECONDS] [--full-render] [--serial]
+    if arg_value('--replay'): start_replay(arg_value('--replay'), arg_value('--now'))
+    elif arg_value('--record'): start_recording(arg_value('--record'))
+    _, timings = run_stages(STAGES, 1 if '--serial' in sys.argv else PIPELINE_WORKERS)
+    report_stages(STAGES, timings)
+    peak = peak_rss_mb()
+    if peak is not None: print(f" > Peak RSS: {peak:.0f} MB")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Run-to-run slate diff. The engine keeps the previous run's normalized match
+# records (plus what it rendered, see master_engine "INCREMENTAL RENDERING"),
+# diffs every new slate against them and appends the result to the change log:
+#   {"run": 1790000000, "added": [id], "removed": [id], "went_live": [id],
+#    "ended": [id], "changed": {id: {field: [old, new]}}}
+# "ended" covers live matches that dropped off the slate or stopped being live.
+SLATE_STATE_PATH = 'assets/data/slate_state.json'
+CHANGE_LOG_PATH = 'assets/data/match_changes.json'
+CHANGE_LOG_KEEP = 96                      # runs kept in the change log
+CLOCK_FIELDS = ('status_text', 'score')   # recomputed from the run time, never a change on their own
+
+# ==========================================
+# 2. HELPERS
+# ==========================================
+def load_json(path, default=None):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except: pass
+    return {} if default is None else default
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), sort_keys=True, ensure_ascii=False)
+
+def digest(value):
+    return hashlib.md5(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+def match_record(m, extra=None):
+    """Public fields minus the clock-derived ones, plus anything else a render depends on."""
+    record = {k: v for k, v in m.to_public().items() if k not in CLOCK_FIELDS}
+    if extra: record.update(extra)
+    return record
+
+# ==========================================
+# 3. DIFF + CHANGE LOG
+# ==========================================
+def diff_slates(old, new, run_ts):
+    """old / new: {id: record}."""
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    went_live, ended, changed = [], [], {}
+    for mid in sorted(set(old) & set(new)):
+        a, b = old[mid], new[mid]
+        fields = {k: [a.get(k), b.get(k)] for k in sorted(set(a) | set(b)) if a.get(k) != b.get(k)}
+        if fields: changed[mid] = fields
+        if b.get('is_live') and not a.get('is_live'): went_live.append(mid)
+        if a.get('is_live') and not b.get('is_live'): ended.append(mid)
+    ended += [mid for mid in removed if old[mid].get('is_live')]
+    return {'run': run_ts, 'added': added, 'removed': removed, 'went_live': went_live, 'ended': sorted(ended), 'changed': changed}
+
+def dirty_ids(diff):
+    """Matches whose rows / pages must be rendered again."""
+    return set(diff['added']) | set(diff['changed'])
+
+def is_empty(diff):
+    return not (diff['added'] or diff['removed'] or diff['changed'])
+
+def summarize(diff):
+    return (f"{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['went_live'])} went live, "
+            f"{len(diff['ended'])} ended, {len(diff['changed'])} changed")
+
+def append_change_log(diff, keep=CHANGE_LOG_KEEP):
+    """Newest run last; runs without changes are not logged."""
+    if is_empty(diff): return
+    log = load_json(CHANGE_LOG_PATH, [])
+    log.append(diff)
+    save_json(CHANGE_LOG_PATH, log[-keep:])
@@ -0,0 +1,144 @@
+import os
+import json
+from entity_names import normalize, canonical_key, names_similar
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Keeps match ids (and so watch URLs, sitemap entries, shared links) stable when
+# an upstream moves a kickoff by a few minutes or respells a team. Entries are
+# grouped by fingerprint = normalized sport + sorted canonical team keys:
+#   "football|arsenal|chelsea": [{"id": "arsenal-vs-chelsea-1a2b3c4d", "ts": ..., "end": ..., "home": ..., "away": ...}]
+# A list, because the same pair can meet again (baseball series, tournaments).
+IDENTITY_PATH = 'assets/data/match_ids.json'
+TIME_WINDOW = 3 * 60 * 60 * 1000   # kickoff drift still treated as the same fixture (ms)
+EVICT_AFTER = 6 * 60 * 60 * 1000   # entries are dropped this long after their match ended (ms)
+DUPLICATE_WINDOW = 15 * 60 * 1000  # same fixture listed twice by one source within a run (ms)
+
+# ==========================================
+# 2. HELPERS
+# ==========================================
+def load_identity():
+    if os.path.exists(IDENTITY_PATH):
+        try:
+            with open(IDENTITY_PATH, 'r', encoding='utf-8') as f: return json.load(f)
+        except: return {}
+    return {}
+
+def save_identity(index):
+    os.makedirs(os.path.dirname(IDENTITY_PATH), exist_ok=True)
+    with open(IDENTITY_PATH, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+def team_names(m):
+    names = [n for n in (m.home, m.away) if n and n != "TBA"]
+    return names or [m.title]
+
+def fingerprint(m):
+    return "|".join([normalize(m.sport)] + sorted(canonical_key(n) for n in team_names(m)))
+
+def describe(m, end):
+    names = team_names(m)
+    return {'ts': m.timestamp, 'end': end, 'home': names[0], 'away': names[1] if len(names) > 1 else ""}
+
+def in_window(entry, ts):
+    return abs(entry['ts'] - ts) <= TIME_WINDOW
+
+def nearest(entries, ts, taken=()):
+    fits = [e for e in entries if in_window(e, ts) and id(e) not in taken]
+    return min(fits, key=lambda e: abs(e['ts'] - ts)) if fits else None
+
+def sources(m):
+    return {s.source for s in m.streams}
+
+def is_duplicate(a, b):
+    """b is a second listing of a: same fingerprint, (almost) same kickoff, a source in common."""
+    return abs(a.timestamp - b.timestamp) <= DUPLICATE_WINDOW and (sources(a) & sources(b) or not (sources(a) or sources(b)))
+
+def unique_id(base, used):
+    mid, n = base, 2
+    while mid in used:
+        mid, n = f"{base}-{n}", n + 1
+    return mid
+
+def is_drifted(entry, m):
+    """Same sport bucket, one team equal and the other respelled (either order)."""
+    old, new = [entry['home'], entry['away']], team_names(m)
+    if len(old) != len(new) or len(new) != 2: return False
+    for a, b in (new, new[::-1]):
+        if (canonical_key(a) == canonical_key(old[0]) and names_similar(b, old[1])) or \
+           (canonical_key(b) == canonical_key(old[1]) and names_similar(a, old[0])): return True
+    return False
+
+# ==========================================
+# 3. ID ASSIGNMENT
+# ==========================================
+def assign_stable_ids(index, matches, ends, now_ms):
+    """
+    Rewrites m.id to the first id its fixture was given. ends[i] is the end time
+    (ms) of matches[i]. An entry is claimed by at most one fixture per run, so
+    a doubleheader (same pair, kickoffs hours apart) keeps two ids:
+      1. exact fingerprints, closest kickoff first
+      2. a second listing of an already resolved fixture (is_duplicate) shares its id
+      3. a respelled fixture takes over an unclaimed entry of the same sport
+      4. anything else gets a new entry, its id made unique
+    Returns (kept, duplicates, drifted, new, evicted) counts.
+    """
+    evicted = 0
+    for fp in list(index):
+        alive = [e for e in index[fp] if e['end'] + EVICT_AFTER >= now_ms]
+        evicted += len(index[fp]) - len(alive)
+        if alive: index[fp] = alive
+        else: del index[fp]
+
+    fps = [fingerprint(m) for m in matches]
+    pairs = sorted((abs(e['ts'] - m.timestamp), i, n)
+                   for i, m in enumerate(matches)
+                   for n, e in enumerate(index.get(fps[i], [])) if in_window(e, m.timestamp))
+    resolved = {}
+    owner = {}  # id(entry) -> index of the match that claimed it; by entry, not match id: one id can sit in two sport buckets
+    for _, i, n in pairs:
+        entry = index[fps[i]][n]
+        if i in resolved or id(entry) in owner: continue
+        resolved[i] = entry
+        owner[id(entry)] = i
+    kept = len(resolved)
+
+    used = {e['id'] for entries in index.values() for e in entries}
+    duplicates = drifted = new = 0
+    for i, m in enumerate(matches):
+        if i in resolved: continue
+        fp = fps[i]
+        entry = next((e for e in index.get(fp, []) if id(e) in owner and is_duplicate(matches[owner[id(e)]], m)), None)
+        if entry:
+            resolved[i] = entry
+            duplicates += 1
+            continue
+        sport = fp.split('|', 1)[0]
+        for old_fp, entries in list(index.items()):
+            if old_fp.split('|', 1)[0] != sport: continue
+            entry = nearest([e for e in entries if is_drifted(e, m)], m.timestamp, owner)
+            if entry:
+                # Re-filed under the new spelling, so the next run is an exact hit
+                entries.remove(entry)
+                if not entries: del index[old_fp]
+                index.setdefault(fp, []).append(entry)
+                drifted += 1
+                break
+        if not entry:
+            entry = dict(describe(m, ends[i]), id=unique_id(m.id, used))
+            used.add(entry['id'])
+            index.setdefault(fp, []).append(entry)
+            new += 1
+        owner[id(entry)] = i
+        resolved[i] = entry
+
+    # Entries follow the latest kickoff/names, so gradual drift keeps matching
+    for i, entry in resolved.items():
+        if owner[id(entry)] == i: entry.update(describe(matches[i], ends[i]))
+        matches[i].id = entry['id']
+    return kept, duplicates, drifted, new, evicted
+
+def known_ids(index):
+    """Ids of every fixture still in the index, i.e. not ended EVICT_AFTER ago."""
+    return {e['id'] for entries in index.values() for e in entries}
@@ -0,0 +1,114 @@
+import re
+import sys
+import glob
+import json
+import tracemalloc
+
+# ==========================================
+# 1. MATCH / STREAM RECORDS
+# ==========================================
+# Compact records for the processed slate. Every engine stage after
+# fetch_and_process reads attributes (m.home, m.is_live, ...); the only place a
+# match becomes a dict again is one of the two serialization views:
+#   to_public()   -> what a match's watch page receives (window.MATCH_DATA)
+#   to_internal() -> public fields + the image-downloader metadata
+class Stream:
+    __slots__ = ('source', 'type', 'name', 'url', 'hd', 'lang')
+
+    def __init__(self, source, name, url, hd=False, lang='', type=None):
+        self.source = source
+        self.type = type
+        self.name = name
+        self.url = url
+        self.hd = hd
+        self.lang = lang
+
+    def to_public(self):
+        d = {'source': self.source}
+        if self.type is not None: d['type'] = self.type  # adstrim channels never had a type
+        d.update({'name': self.name, 'url': self.url, 'hd': self.hd, 'lang': self.lang})
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get('source'), d.get('name'), d.get('url'), d.get('hd', False), d.get('lang', ''), d.get('type'))
+
+class Match:
+    __slots__ = ('id', 'home', 'away', 'title', 'league', 'sport', 'timestamp', 'is_live',
+                 'status_text', 'viewers', 'streams', 'score', 'is_single', 'img_meta')
+    PUBLIC_FIELDS = __slots__[:-1]
+
+    def __init__(self, id, home, away, title, league, sport, timestamp, is_live,
+                 status_text, viewers, streams, score, is_single, img_meta=None):
+        self.id = id
+        self.home = home
+        self.away = away
+        self.title = title
+        self.league = league
+        self.sport = sport
+        self.timestamp = timestamp
+        self.is_live = is_live
+        self.status_text = status_text
+        self.viewers = viewers
+        self.streams = streams
+        self.score = score
+        self.is_single = is_single
+        self.img_meta = img_meta or {}
+
+    def to_public(self):
+        d = {f: getattr(self, f) for f in self.PUBLIC_FIELDS}
+        d['streams'] = [s.to_public() for s in self.streams]
+        return d
+
+    def to_internal(self):
+        d = self.to_public()
+        d['_img_meta'] = self.img_meta
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        """Accepts either view (public or internal)."""
+        fields = {f: d.get(f) for f in cls.PUBLIC_FIELDS}
+        fields['streams'] = [Stream.from_dict(s) for s in d.get('streams') or []]
+        return cls(img_meta=d.get('_img_meta'), **fields)
+
+# ==========================================
+# 2. MEMORY BENCHMARK (python scripts/match_model.py [factor])
+# ==========================================
+WATCH_PAGES = 'watch/*/index.html'
+
+def load_slate():
+    """The last slate master_engine prerendered (one match per watch page)."""
+    slate = []
+    for path in sorted(glob.glob(WATCH_PAGES)):
+        with open(path, 'r', encoding='utf-8') as f: html = f.read()
+        found = re.search(r'window\.MATCH_DATA\s*=\s*(\[.*?\]);', html, flags=re.DOTALL)
+        if found: slate.extend(json.loads(found.group(1)))
+    return slate
+
+def measure(build):
+    tracemalloc.start()
+    data = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return data, size
+
+def benchmark(factor=10):
+    slate = load_slate()
+    if not slate:
+        print(f" > No MATCH_DATA found in {WATCH_PAGES}")
+        return
+    # Re-parse per copy so no strings/lists are shared between the two builds
+    raw = json.dumps([dict(m, _img_meta={}) for m in slate])
+    _, dict_size = measure(lambda: [m for _ in range(factor) for m in json.loads(raw)])
+    _, obj_size = measure(lambda: [Match.from_dict(m) for _ in range(factor) for m in json.loads(raw)])
+
+    count = len(slate) * factor
+    print(f" > {count} matches ({len(slate)} x {factor})")
+    print(f"   - dict records:  {dict_size / 1024:.0f} KB ({dict_size / count:.0f} B/match)")
+    print(f"   - Match records: {obj_size / 1024:.0f} KB ({obj_size / count:.0f} B/match)")
+    print(f"   = saved {(dict_size - obj_size) / 1024:.0f} KB ({1 - obj_size / dict_size:.0%})")
+
+if __name__ == "__main__":
+    print("--- Match Record Memory Benchmark ---")
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,106 @@
+import os
+import re
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Whitespace/comment minifier for generated pages. Conservative on purpose:
+# master_engine re-reads these pages and injects between the markers below.
+#  - <!-- LIVE_START --> style markers (single UPPER_CASE token) are kept
+#  - <script>, <pre>, <textarea> bodies are left byte-for-byte intact
+#  - whitespace runs collapse to one space (or one newline), never to nothing,
+#    so inline spacing renders exactly as before
+MARKER_COMMENT = re.compile(r'<!--\s*[A-Z][A-Z0-9_]*\s*-->')
+PROTECTED_BLOCK = re.compile(r'<(script|pre|textarea|style)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.DOTALL | re.IGNORECASE)
+NEWLINE_RUN = re.compile(r'[ \t\r\f\v]*\n\s*')
+SPACE_RUN = re.compile(r'[ \t\r\f\v]{2,}')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+STYLE_BLOCK = re.compile(r'(<style\b[^>]*>)(.*)(</style\s*>)', re.DOTALL | re.IGNORECASE)
+
+# Savings of every page written this run: [(path, before, after)]. Writers
+# running side by side pass their own list (stats=) and merge it in afterwards.
+MINIFY_STATS = []
+
+# ==========================================
+# 2. MINIFIERS
+# ==========================================
+def collapse_whitespace(text):
+    return SPACE_RUN.sub(' ', NEWLINE_RUN.sub('\n', text))
+
+def minify_css(css):
+    return collapse_whitespace(CSS_COMMENT.sub('', css)).strip()
+
+def minify_fragment(html):
+    """minify_html without the final trim, for documents written piece by piece."""
+    out = []
+    pos = 0
+    for block in PROTECTED_BLOCK.finditer(html):
+        out.append(collapse_whitespace(html[pos:block.start()]))
+        chunk = block.group(0)
+        if chunk.startswith('<!--'):
+            # Injection markers and IE conditionals survive, plain comments go
+            if MARKER_COMMENT.fullmatch(chunk) or chunk.startswith('<!--['): out.append(chunk)
+        elif block.group(1).lower() == 'style':
+            out.append(STYLE_BLOCK.sub(lambda m: f"{m.group(1)}{minify_css(m.group(2))}{m.group(3)}", chunk))
+        else:
+            out.append(chunk)
+        pos = block.end()
+    out.append(collapse_whitespace(html[pos:]))
+    return ''.join(out)
+
+def minify_html(html):
+    return minify_fragment(html).strip() + '\n'
+
+def minify_xml(xml):
+    return re.sub(r'>\s+<', '><', xml).strip() + '\n'
+
+# ==========================================
+# 3. WRITER + REPORT
+# ==========================================
+def replace_output(tmp, path, accept=None):
+    """Moves tmp over path unless accept(size in bytes) refuses it (path is left as it was)."""
+    if accept and not accept(os.path.getsize(tmp)):
+        os.remove(tmp)
+        return False
+    os.replace(tmp, path)
+    return True
+
+def write_minified(path, content, accept=None, stats=None):
+    """
+    Minifies by extension, writes the file and records the byte savings.
+    Returns False when accept (see replace_output) refused the new file.
+    """
+    small = minify_xml(content) if path.endswith('.xml') else minify_html(content)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f: f.write(small)
+    if not replace_output(tmp, path, accept): return False
+    (MINIFY_STATS if stats is None else stats).append((path, len(content.encode('utf-8')), len(small.encode('utf-8'))))
+    return True
+
+def write_minified_parts(path, parts, accept=None, stats=None):
+    """
+    Streaming write_minified: each fragment is minified and written as it is
+    produced, so the full document never exists as one string. Fragments must
+    not split a <script>/<style>/<pre> block. Written via a temp file so a
+    failed run never leaves a half page behind.
+    """
+    before = after = 0
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for part in parts:
+            small = minify_fragment(part)
+            f.write(small)
+            before += len(part.encode('utf-8'))
+            after += len(small.encode('utf-8'))
+    if not replace_output(tmp, path, accept): return False
+    (MINIFY_STATS if stats is None else stats).append((path, before, after))
+    return True
+
+def print_minify_report(report_top=10):
+    if not MINIFY_STATS: return
+    before = sum(s[1] for s in MINIFY_STATS)
+    after = sum(s[2] for s in MINIFY_STATS)
+    print(f" > Minified {len(MINIFY_STATS)} files: {before / 1024:.0f} KB -> {after / 1024:.0f} KB (-{(before - after) / 1024:.0f} KB)")
+    for path, b, a in sorted(MINIFY_STATS, key=lambda s: (s[1] - s[2], s[0]), reverse=True)[:report_top]:
+        print(f"   - {os.path.normpath(path)}: -{(b - a) / 1024:.1f} KB ({(b - a) / b:.0%})")
+    MINIFY_STATS.clear()
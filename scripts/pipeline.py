@@ -0,0 +1,138 @@
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Minimal stage graph runner. A stage is (name, deps, fn): fn(results) runs
+# once every stage named in deps has finished and its return value is stored
+# as results[name]. Independent stages overlap on a thread pool, so network
+# bound work (logo downloads) runs while pages render.
+#  - prints from a stage are buffered and flushed in declaration order, so the
+#    log reads the same whatever finished first
+#  - the first failing stage (SystemExit included) stops new submissions and is
+#    re-raised once the running stages are done
+#  - report_stages() prints measured times plus the critical path: the chain of
+#    stages that bounds the run even with unlimited workers
+PIPELINE_WORKERS = 4
+
+# ==========================================
+# 2. STAGE OUTPUT
+# ==========================================
+class StageOutput:
+    """sys.stdout stand-in: writes from a stage thread go to that stage's buffer."""
+
+    def __init__(self, real):
+        self.real = real
+        self.local = threading.local()
+
+    def write(self, text):
+        buf = getattr(self.local, 'buf', None)
+        if buf is None: return self.real.write(text)
+        buf.append(text)
+        return len(text)
+
+    def flush(self):
+        self.real.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.real, name)
+
+# ==========================================
+# 3. RUNNER
+# ==========================================
+def check_graph(stages):
+    names = [s[0] for s in stages]
+    if len(set(names)) != len(names): raise ValueError("duplicate stage names")
+    for name, deps, _ in stages:
+        # Declaration order must already be a topological order (no cycles)
+        unknown = [d for d in deps if d not in names[:names.index(name)]]
+        if unknown: raise ValueError(f"stage {name}: {unknown} not declared before it")
+
+def run_stages(stages, workers=PIPELINE_WORKERS):
+    """Returns (results, timings) with timings[name] = (start, end) in seconds from the run start."""
+    check_graph(stages)
+    out = StageOutput(sys.stdout)
+    results, timings, logs = {}, {}, {}
+    t0 = time.perf_counter()
+
+    def run(name, fn):
+        out.local.buf = logs[name] = []
+        start = time.perf_counter() - t0
+        try: return fn(results)
+        finally:
+            timings[name] = (start, time.perf_counter() - t0)
+            out.local.buf = None
+
+    pending = list(stages)
+    running = {}
+    flushed = 0
+    failure = None
+    sys.stdout = out
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                if failure is None:
+                    for stage in [s for s in pending if all(d in results for d in s[1])]:
+                        pending.remove(stage)
+                        running[pool.submit(run, stage[0], stage[2])] = stage[0]
+                if not running: break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try: results[name] = future.result()
+                    except BaseException as e:
+                        if failure is None: failure = e
+                # Logs of finished stages, in declaration order
+                while flushed < len(stages) and stages[flushed][0] in timings:
+                    out.real.write(''.join(logs[stages[flushed][0]]))
+                    flushed += 1
+    finally:
+        sys.stdout = out.real
+    # Whatever is left when a stage failed (finished stages after a still-pending one)
+    for name, _, _ in stages[flushed:]:
+        if name in logs: sys.stdout.write(''.join(logs[name]))
+    if failure is not None: raise failure
+    return results, timings
+
+# ==========================================
+# 4. CRITICAL PATH REPORT
+# ==========================================
+def critical_path(stages, timings):
+    """
+    Classic CPM over measured durations: earliest finish going forward, latest
+    finish going backward; stages without slack form the critical path.
+    Returns ({name: slack}, path, length).
+    """
+    dur = {name: timings[name][1] - timings[name][0] for name, _, _ in stages}
+    deps = {name: d for name, d, _ in stages}
+    ef = {}
+    for name, d, _ in stages:
+        ef[name] = dur[name] + max((ef[x] for x in d), default=0)
+    length = max(ef.values(), default=0)
+    lf = {}
+    for name, _, _ in reversed(stages):
+        children = [c for c, d, _ in stages if name in d]
+        lf[name] = min((lf[c] - dur[c] for c in children), default=length)
+    slack = {name: lf[name] - ef[name] for name in ef}
+
+    # Walk back from the stage that finishes last, through its latest-finishing dependency
+    path = []
+    name = max(ef, key=ef.get) if ef else None
+    while name:
+        path.append(name)
+        name = max(deps[name], key=ef.get) if deps[name] else None
+    return slack, path[::-1], length
+
+def report_stages(stages, timings):
+    slack, path, length = critical_path(stages, timings)
+    wall = max(end for _, end in timings.values())
+    serial = sum(end - start for start, end in timings.values())
+    print(f" > Pipeline: {wall:.2f}s wall, {serial:.2f}s of stage time (critical path {length:.2f}s)")
+    for name, _, _ in stages:
+        start, end = timings[name]
+        mark = '*' if name in path else ' '
+        print(f"   {mark} {name:<10} {end - start:7.2f}s  [{start:6.2f} -> {end:6.2f}]  slack {slack[name]:.2f}s")
+    print(f"   = critical path: {' -> '.join(path)}")
@@ -0,0 +1,148 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Brotli is optional: without it only .gz siblings are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Writes max-level .br/.gz siblings next to every generated page/sheet so static
+# hosts / CDNs that serve precompressed files never compress at request time.
+# Only generated outputs are compressed, never hand-maintained files (admin/,
+# 404.html, ...): the fixed output dirs below plus every page build_site and
+# master_engine record in their manifests. Siblings are redone when the
+# source's content hash differs from the one they were made from (mtimes are
+# checkout order after a fresh clone, so they say nothing).
+OUTPUT_DIR = '.'
+OUTPUT_DIRS = ('watch', 'chunks', 'search', 'assets/css', 'assets/js')
+OUTPUT_FILES = ('index.html', 'sitemap.xml')
+PAGE_MANIFESTS = ('assets/data/build_manifest.json', 'assets/data/output_sizes.json')
+MANIFEST_PATH = 'assets/data/precompress_manifest.json'   # {source path: sha256 of what its siblings hold}
+COMPRESS_EXTS = ('.html', '.json', '.xml', '.css', '.js')
+SKIP_DIRS = {'.git', '.github', 'scripts', 'data', 'node_modules'}
+SKIP_PATHS = {'assets/data'}          # pipeline state, not served pages
+SKIP_FILES = ('_template.html',)       # build inputs
+MIN_SIZE = 1024                        # not worth a sibling below this
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+WORKERS = os.cpu_count() or 4
+
+# ==========================================
+# 2. HELPERS
+# ==========================================
+def load_json(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except: pass
+    return {}
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+def sibling_formats():
+    return ['gz', 'br'] if brotli else ['gz']
+
+def generated_paths(root):
+    """Pages the generators recorded, relative to root with '/' separators."""
+    paths = set()
+    for manifest in PAGE_MANIFESTS:
+        paths.update(os.path.normpath(p).replace(os.sep, '/') for p in load_json(os.path.join(root, manifest)))
+    return paths
+
+def is_generated(rel, pages):
+    return rel in pages or rel in OUTPUT_FILES or any(rel.startswith(d + '/') for d in OUTPUT_DIRS)
+
+def find_outputs(root=OUTPUT_DIR):
+    """
+    Every generated HTML/JSON/XML/CSS/JS file under root, plus siblings whose
+    source is gone or is not a generated output (hand-maintained files).
+    """
+    pages = generated_paths(root)
+    outputs, orphans = [], []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and (d if rel_dir == '.' else f"{rel_dir}/{d}") not in SKIP_PATHS]
+        for f in filenames:
+            path = os.path.join(dirpath, f)
+            rel = f if rel_dir == '.' else f"{rel_dir}/{f}"
+            if f.endswith(('.gz', '.br')):
+                if not os.path.exists(path[:-3]) or not is_generated(rel[:-3], pages): orphans.append(path)
+            elif f.endswith(COMPRESS_EXTS) and not f.endswith(SKIP_FILES) and is_generated(rel, pages):
+                outputs.append(path)
+    return outputs, orphans
+
+def source_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def compress_file(path, made_from=None):
+    """
+    Rewrites the stale siblings of one file: missing, or made from other content
+    than the file holds now (made_from: its manifest hash).
+    Returns (path, raw, {fmt: size}, rewritten, hash).
+    """
+    with open(path, 'rb') as f: data = f.read()
+    digest = source_hash(data)
+    sizes = {}
+    rewritten = False
+    for fmt in sibling_formats():
+        sib = f"{path}.{fmt}"
+        if len(data) < MIN_SIZE:
+            if os.path.exists(sib): os.remove(sib)
+            continue
+        if made_from != digest or not os.path.exists(sib):
+            # mtime=0 keeps gzip output byte-identical for unchanged pages (no git churn)
+            blob = gzip.compress(data, GZIP_LEVEL, mtime=0) if fmt == 'gz' else brotli.compress(data, quality=BROTLI_QUALITY)
+            with open(sib, 'wb') as f: f.write(blob)
+            rewritten = True
+        sizes[fmt] = os.path.getsize(sib)
+    return path, len(data), sizes, rewritten, digest
+
+def fmt_kb(n):
+    return f"{n / 1024:.0f} KB"
+
+# ==========================================
+# 3. MAIN EXECUTION
+# ==========================================
+def precompress_outputs(root=OUTPUT_DIR, report_top=8):
+    outputs, orphans = find_outputs(root)
+    for p in orphans: os.remove(p)
+
+    manifest_path = os.path.join(root, MANIFEST_PATH)
+    manifest = load_json(manifest_path)
+    keys = [os.path.relpath(p, root).replace(os.sep, '/') for p in outputs]
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        results = list(executor.map(compress_file, outputs, [manifest.get(k) for k in keys]))
+    # Only files that have siblings: small ones are re-checked from scratch once they grow
+    save_json(manifest_path, {k: r[4] for k, r in zip(keys, results) if r[2]})
+
+    done = [r for r in results if r[2]]
+    rewritten = sum(1 for r in results if r[3])
+    if not brotli: print("   [!] brotli not installed, writing .gz only")
+    print(f" > Precompressed {rewritten} changed / {len(done)} files ({len(orphans)} orphaned siblings removed)")
+
+    for path, raw, sizes, _, _ in sorted(done, key=lambda r: -r[1])[:report_top]:
+        parts = ", ".join(f"{fmt} {fmt_kb(size)} ({size / raw:.0%})" for fmt, size in sizes.items())
+        print(f"   - {os.path.relpath(path, root)}: {fmt_kb(raw)} -> {parts}")
+
+    total_raw = sum(r[1] for r in done)
+    for fmt in sibling_formats():
+        total = sum(r[2].get(fmt, 0) for r in done)
+        if total_raw: print(f"   = total {fmt}: {fmt_kb(total_raw)} -> {fmt_kb(total)} ({total / total_raw:.0%})")
+
+def main():
+    print("--- Precompressing Outputs ---")
+    precompress_outputs(sys.argv[1] if len(sys.argv) > 1 else OUTPUT_DIR)
+
+if __name__ == "__main__":
+    main()
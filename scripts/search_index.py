@@ -0,0 +1,179 @@
+import os
+import re
+import sys
+import json
+import time
+import unicodedata
+from entity_names import canonical_name
+
+# ==========================================
+# 1. CONFIGURATION
+# ==========================================
+# Client-side slate search. Each run writes search/<xx>.json shards keyed by
+# the first SHARD_CHARS characters of a word, so the search box fetches one
+# small file for what the visitor typed instead of the whole slate:
+#   docs -> [id, label, league, start (unix s), live, words] for the matches in the shard
+#   p    -> docs with a word starting with the shard key (2 character queries)
+#   g    -> trigram -> docs with a word containing it (3+ characters, the
+#           trigram's first two characters are the shard key)
+# The client keeps the candidates where every typed word hits a word of the
+# match (search() below is the reference lookup the homepage script mirrors).
+SEARCH_DIR = 'search'
+SHARD_CHARS = 2
+TRIGRAM = 3
+RESULT_LIMIT = 20
+
+# ==========================================
+# 2. TOKENIZER
+# ==========================================
+def fold(text):
+    """Lowercase without accents ("Bodø/Glimt" -> "bodø/glimt", "Atlético" -> "atletico")."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+def words(text):
+    return re.findall(r'[a-z0-9]+', fold(text))
+
+def term_hit(term, word):
+    """Short terms match word starts only ("fc" is not "wolfcastle"), longer ones anywhere."""
+    return word.startswith(term) if len(term) < TRIGRAM else term in word
+
+def doc_hit(terms, doc):
+    doc_words = doc[5].split()
+    return all(any(term_hit(t, w) for w in doc_words) for t in terms)
+
+def match_doc(m):
+    label = m.title if m.is_single and m.title else f"{m.home} vs {m.away}"
+    names = [label, m.league, m.sport]
+    # Learned aliases make "man utd" find "Manchester United" and the other way round
+    if not m.is_single: names += [canonical_name(m.home), canonical_name(m.away)]
+    terms = list(dict.fromkeys(w for name in names for w in words(name)))
+    return [m.id, label, m.league, int(m.timestamp / 1000), int(bool(m.is_live)), " ".join(terms)], terms
+
+# ==========================================
+# 3. BUILD + WRITE
+# ==========================================
+def build_index(matches):
+    """{shard key: {'docs': [...], 'p': [doc idx], 'g': {trigram: [doc idx]}}}"""
+    shards = {}
+
+    def slot(key, doc):
+        shard = shards.setdefault(key, {'docs': [], 'ids': {}, 'p': set(), 'g': {}})
+        if doc[0] not in shard['ids']:
+            shard['ids'][doc[0]] = len(shard['docs'])
+            shard['docs'].append(doc)
+        return shard, shard['ids'][doc[0]]
+
+    seen = set()
+    for m in matches:
+        if not m.id or m.id in seen: continue
+        seen.add(m.id)
+        doc, terms = match_doc(m)
+        for w in terms:
+            if len(w) < SHARD_CHARS: continue
+            shard, i = slot(w[:SHARD_CHARS], doc)
+            shard['p'].add(i)
+            for k in range(len(w) - TRIGRAM + 1):
+                tri = w[k:k + TRIGRAM]
+                shard, i = slot(tri[:SHARD_CHARS], doc)
+                shard['g'].setdefault(tri, set()).add(i)
+
+    return {key: {'docs': s['docs'], 'p': sorted(s['p']), 'g': {t: sorted(ids) for t, ids in sorted(s['g'].items())}}
+            for key, s in sorted(shards.items())}
+
+def dump_shard(shard):
+    return json.dumps(shard, separators=(',', ':'), ensure_ascii=False)
+
+def write_search_index(matches, out_dir=SEARCH_DIR):
+    shards = build_index(matches)
+    os.makedirs(out_dir, exist_ok=True)
+    written = total = 0
+    for key, shard in shards.items():
+        path = os.path.join(out_dir, f"{key}.json")
+        blob = dump_shard(shard)
+        total += len(blob.encode('utf-8'))
+        # Unchanged shards are left alone (no git churn, precompress keeps their siblings)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == blob: continue
+        with open(path, 'w', encoding='utf-8') as f: f.write(blob)
+        written += 1
+
+    removed = 0
+    for f in os.listdir(out_dir):
+        if f.endswith('.json') and f[:-5] not in shards:
+            os.remove(os.path.join(out_dir, f))
+            removed += 1
+    print(f" > Search index: {len(shards)} shards ({written} changed, {removed} removed), {total / 1024:.0f} KB")
+
+# ==========================================
+# 4. LOOKUP
+# ==========================================
+def search(query, load_shard, limit=RESULT_LIMIT):
+    """Docs matching every word of query; live first, then by start time. load_shard(key) -> shard or None."""
+    terms = words(query)
+    key_word = max(terms, key=len, default='')
+    if len(key_word) < SHARD_CHARS: return []
+    shard = load_shard(key_word[:SHARD_CHARS])
+    if not shard: return []
+    candidates = shard['p'] if len(key_word) < TRIGRAM else shard['g'].get(key_word[:TRIGRAM], [])
+    hits = [shard['docs'][i] for i in candidates if doc_hit(terms, shard['docs'][i])]
+    hits.sort(key=lambda d: (-d[4], d[3]))
+    return hits[:limit]
+
+def scan(query, docs, limit=RESULT_LIMIT):
+    """What the client would do without the index: every doc, every query."""
+    terms = words(query)
+    if not terms: return []
+    hits = [d for d in docs if doc_hit(terms, d)]
+    hits.sort(key=lambda d: (-d[4], d[3]))
+    return hits[:limit]
+
+# ==========================================
+# 5. BENCHMARK (python scripts/search_index.py --bench [factor])
+# ==========================================
+def benchmark(factor=10, rounds=5):
+    from match_model import Match, load_slate
+    slate = [Match.from_dict(d) for d in load_slate()]
+    if not slate:
+        print(" > No prerendered watch pages to index")
+        return
+    # Distinct ids per copy so the factor really multiplies the docs
+    matches = [Match.from_dict(dict(m.to_public(), id=f"{m.id}-{n}")) for n in range(factor) for m in slate]
+
+    start = time.perf_counter()
+    shards = build_index(matches)
+    build_s = time.perf_counter() - start
+    blobs = {key: dump_shard(s) for key, s in shards.items()}
+    sizes = sorted(len(b.encode('utf-8')) for b in blobs.values())
+    full = len(json.dumps([m.to_public() for m in matches], separators=(',', ':')).encode('utf-8'))
+    print(f" > {len(matches)} matches ({len(slate)} x {factor}), build {build_s * 1000:.0f} ms")
+    print(f"   - {len(shards)} shards, total {sum(sizes) / 1024:.0f} KB, median {sizes[len(sizes) // 2] / 1024:.1f} KB, largest {sizes[-1] / 1024:.1f} KB")
+    print(f"   - full slate JSON a client would otherwise load: {full / 1024:.0f} KB")
+
+    # Queries: prefixes of real words, plus two word queries
+    terms = sorted({w for m in slate for w in match_doc(m)[1] if len(w) >= 4})
+    queries = [w[:n] for w in terms[::max(1, len(terms) // 100)] for n in (2, 3, 5)]
+    queries += [f"{a[:4]} {b[:3]}" for a, b in zip(terms[::50], terms[25::50])]
+
+    docs = [match_doc(m)[0] for m in matches]
+    # Each lookup parses its shard, like a browser that just fetched it
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in queries: search(q, lambda key: json.loads(blobs[key]) if key in blobs else None)
+    index_s = (time.perf_counter() - start) / (rounds * len(queries))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in queries: scan(q, docs)
+    scan_s = (time.perf_counter() - start) / (rounds * len(queries))
+
+    loaded = [len(blobs.get(max(words(q), key=len)[:SHARD_CHARS], '').encode('utf-8')) for q in queries]
+    differ = sum(1 for q in queries if [d[0] for d in search(q, lambda key: shards.get(key))] != [d[0] for d in scan(q, docs)])
+    print(f"   - {len(queries)} queries: index {index_s * 1e3:.2f} ms/query (avg shard {sum(loaded) / len(loaded) / 1024:.1f} KB), full scan {scan_s * 1e3:.2f} ms/query")
+    print(f"   = {scan_s / index_s:.1f}x faster, {differ} queries answered differently")
+
+if __name__ == "__main__":
+    if '--bench' in sys.argv:
+        print("--- Search Index Benchmark ---")
+        args = [a for a in sys.argv[1:] if a != '--bench']
+        benchmark(int(args[0]) if args else 10)